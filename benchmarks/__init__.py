@@ -0,0 +1 @@
+# Benchmarks for the assignment tracker, run with python -m benchmarks.<name>
@@ -0,0 +1,151 @@
+# Runs the benchmark scenarios against a generated dataset and writes the timings as json.
+#
+#   python -m benchmarks --users 1000 --per-user 200 --output results.json
+#   python -m benchmarks --users 1000 --per-user 200 --baseline results.json   # compare with a saved run
+#
+# UI scenarios need a display; without one they are skipped, or run under Xvfb with --xvfb.
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import generate
+from benchmarks.scenarios import SCENARIOS, Context
+from tracker import storage
+
+
+def ui_unavailable(use_xvfb):
+    # returns why the Tk scenarios can't run, or None if they can
+    import tkinter
+
+    try:
+        tkinter.Tk().destroy()
+        return None
+    except tkinter.TclError as e:
+        reason = f"no display ({e})"
+    if not use_xvfb or shutil.which("Xvfb") is None:
+        return reason
+    display = ":99"
+    subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24"],
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    time.sleep(1)
+    try:
+        tkinter.Tk().destroy()
+        return None
+    except tkinter.TclError as e:
+        return f"Xvfb did not start ({e})"
+
+
+def time_scenario(ctx, make, repeat):
+    runs = []
+    for _ in range(repeat):
+        run, teardown = make(ctx)
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+        if teardown is not None:
+            teardown()
+    return {"median": statistics.median(runs), "min": min(runs), "max": max(runs), "runs": runs}
+
+
+def compare(results, baseline, max_regression):
+    # prints every scenario next to the baseline and returns the names that got slower than allowed
+    regressions = []
+    print(f"\n{'scenario':20} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name, {})
+        if "median" not in result or "median" not in old:
+            continue
+        change = result["median"] / old["median"] - 1 if old["median"] else 0.0
+        flag = ""
+        if change > max_regression:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:20} {old['median'] * 1000:10.2f}ms {result['median'] * 1000:10.2f}ms {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the assignment tracker on synthetic data.")
+    generate.add_arguments(parser)
+    parser.add_argument("--backend", default="json", choices=storage.BACKENDS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenarios", help="comma separated names (default: all of them)")
+    parser.add_argument("--no-ui", action="store_true", help="skip the Tk scenarios")
+    parser.add_argument("--xvfb", action="store_true", help="start Xvfb when there is no display")
+    parser.add_argument("--data-dir", help="reuse (or create) this data directory instead of a temporary one")
+    parser.add_argument("--output", help="write the results to this json file")
+    parser.add_argument("--baseline", help="compare against results saved with --output")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed slowdown against the baseline before failing (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="tracker-bench-")
+    if not os.path.exists(os.path.join(data_dir, "users.json")):
+        generate.write_dataset(data_dir, args.users, args.per_user, args.days, args.classes, args.seed)
+    if args.backend != "json":
+        json_files = Context(data_dir).files()
+        storage.migrate(storage.JsonBackend(*json_files[:3]), storage.open_backend(args.backend, *json_files))
+
+    skip_ui = "skipped with --no-ui" if args.no_ui else None
+    if not skip_ui and any(SCENARIOS[name].ui for name in names):
+        skip_ui = ui_unavailable(args.xvfb)
+
+    ctx = Context(data_dir, args.backend)
+    results = {}
+    try:
+        for name in names:
+            if SCENARIOS[name].ui and skip_ui:
+                results[name] = {"skipped": skip_ui}
+                print(f"{name:20} skipped: {skip_ui}")
+                continue
+            results[name] = time_scenario(ctx, SCENARIOS[name], args.repeat)
+            print(f"{name:20} median {results[name]['median'] * 1000:10.2f}ms  min {results[name]['min'] * 1000:10.2f}ms")
+    finally:
+        ctx.close()
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "users": args.users,
+            "per_user": args.per_user,
+            "days": args.days,
+            "classes": args.classes,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print(f"\nSlower than the baseline by more than {args.max_regression:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Load test for the local json api (tracker.server): requests per second and latency percentiles.
+#
+#   python -m benchmarks.api_load --users 200 --per-user 200 --connections 16 --requests 20000
+#   python -m benchmarks.api_load --url http://127.0.0.1:8765 --user alice   # against a running server
+#
+# Without --url it generates a dataset, starts `python -m tracker.server` on it and stops it at the
+# end. Every connection is kept alive and sends a mix of listing (with filters and searches),
+# progress, add, edit and delete requests for random users.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from benchmarks import generate
+from benchmarks.scenarios import Context
+from tracker import storage
+
+MIX = (("list", 0.55), ("search", 0.1), ("progress", 0.15), ("add", 0.1), ("edit", 0.07), ("delete", 0.03))
+
+
+async def request(reader, writer, host, method, path, body=None):
+    # sends one request on a kept-alive connection and returns (status, decoded body)
+    data = b"" if body is None else json.dumps(body).encode()
+    content_type = "" if body is None else "Content-Type: application/json\r\n"
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n{content_type}Content-Length: {len(data)}\r\n\r\n".encode()
+                 + data)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    payload = await reader.readexactly(length) if length else b""
+    return status, json.loads(payload) if payload else None
+
+
+async def client(host, port, usernames, count, seed, latencies, errors):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    added = []  # (username, id) of the assignments this connection added
+    ops, weights = zip(*MIX)
+    try:
+        for _ in range(count):
+            op = rng.choices(ops, weights)[0]
+            username = rng.choice(usernames)
+            if op in ("edit", "delete") and not added:
+                op = "add"
+            if op == "list":
+                path = f"/users/{username}/assignments?completed=false&class=Class%20{rng.randrange(6) + 1}"
+                args = ("GET", path)
+            elif op == "search":
+                args = ("GET", f"/users/{username}/assignments?q={rng.choice(generate.ASSIGNMENT_TYPES)[:3].lower()}")
+            elif op == "progress":
+                args = ("GET", f"/users/{username}/progress?by={rng.choice(('class', 'type', 'week'))}")
+            elif op == "add":
+                args = ("POST", f"/users/{username}/assignments",
+                        {"title": "Load test", "due_date": "2025-03-01", "class_name": "Class 1", "assignment_type": "Hw"})
+            elif op == "edit":
+                owner, assignment_id = rng.choice(added)
+                args = ("PATCH", f"/users/{owner}/assignments/{assignment_id}", {"completed": True})
+            else:
+                owner, assignment_id = added.pop(rng.randrange(len(added)))
+                args = ("DELETE", f"/users/{owner}/assignments/{assignment_id}")
+            start = time.perf_counter()
+            status, payload = await request(reader, writer, f"{host}:{port}", *args)
+            latencies.setdefault(op, []).append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append((op, status, payload))
+            elif op == "add":
+                added.append((username, payload["id"]))
+    finally:
+        writer.close()
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run(host, port, usernames, connections, requests):
+    latencies, errors = {}, []
+    per_connection = max(1, requests // connections)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, usernames, per_connection, n, latencies, errors)
+                           for n in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests over {connections} connections in {elapsed:.2f}s: {total / elapsed:.0f} req/s")
+    print(f"{'':10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, values in sorted(latencies.items()) + [("all", [v for values in latencies.values() for v in values])]:
+        values.sort()
+        print(f"{op:10}{len(values):8}" + "".join(f"{percentile(values, p) * 1000:10.2f}" for p in (50, 95, 99))
+              + f"{values[-1] * 1000:10.2f}")
+    for op, status, payload in errors[:5]:
+        print(f"error: {op} -> {status} {payload}")
+    if errors:
+        print(f"{len(errors)} requests failed")
+    return not errors
+
+
+def start_server(data_dir, backend):
+    command = [sys.executable, "-m", "tracker.server", "--port", "0", "--data-dir", data_dir]
+    if backend:
+        command += ["--backend", backend]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    line = server.stdout.readline()
+    if not line:
+        raise SystemExit("the server did not start")
+    return server, urlsplit(line.split()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.api_load", description="Load test the local json api.")
+    parser.add_argument("--url", help="a running server (default: start one on a generated dataset)")
+    parser.add_argument("--user", action="append", help="username to use with --url, can be repeated")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--per-user", type=int, default=200)
+    parser.add_argument("--backend", help="storage backend of the started server")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    if args.url:
+        url = urlsplit(args.url)
+        ok = asyncio.run(run(url.hostname, url.port, args.user or [generate.username(0)], args.connections, args.requests))
+        sys.exit(0 if ok else 1)
+
+    with tempfile.TemporaryDirectory(prefix="tracker-api-") as data_dir:
+        generate.write_dataset(data_dir, args.users, args.per_user)
+        if args.backend and args.backend != "json":
+            json_files = Context(data_dir).files()
+            storage.migrate(storage.JsonBackend(*json_files[:3]), storage.open_backend(args.backend, *json_files))
+        server, url = start_server(data_dir, args.backend)
+        try:
+            usernames = [generate.username(u) for u in range(args.users)]
+            ok = asyncio.run(run(url.hostname, url.port, usernames, args.connections, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Generates a synthetic data directory (users.json, users_settings.json, assignments.json) at any scale.
+#
+#   python -m benchmarks.generate /tmp/tracker-data --users 1000 --per-user 200 --days 120 --classes 6
+#
+# The same seed always gives the same data, so benchmark runs can be compared with each other.
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+
+ASSIGNMENT_TYPES = ("Hw", "Essay", "Exam", "Lab", "Reading", "Project")
+START_DATE = date(2025, 1, 1)
+PASSWORD = "password"
+
+
+def username(index):
+    return f"user{index}"
+
+
+def make_user_assignments(rng, user_index, per_user, days, classes):
+    # the {id: record} assignments of one user, due within `days` days of START_DATE
+    assignments = {}
+    for i in range(per_user):
+        assignment_id = f"u{user_index}a{i}"
+        assignments[assignment_id] = {
+            "id": assignment_id,
+            "title": f"{rng.choice(ASSIGNMENT_TYPES)} {i}",
+            "due_date": (START_DATE + timedelta(days=rng.randrange(days))).isoformat(),
+            "class_name": f"Class {rng.randrange(classes) + 1}",
+            "assignment_type": rng.choice(ASSIGNMENT_TYPES),
+            "completed": rng.random() < 0.4,
+            "priority": rng.random() < 0.15,
+        }
+    return assignments
+
+
+def make_dataset(users, per_user, days=120, classes=6, seed=0):
+    # returns (users, settings, assignments) dictionaries in the app's file layouts
+    rng = random.Random(seed)
+    user_data, settings, assignments = {}, {}, {}
+    for u in range(users):
+        name = username(u)
+        user_data[name] = {"first_name": "User", "last_name": str(u), "password": PASSWORD,
+                           "role": "admin" if u == 0 else "student"}
+        settings[name] = {"password": PASSWORD, "first_name": "User", "last_name": str(u),
+                          "profile_picture": "", "default_view": "Home"}
+        assignments[name] = {"assignments": make_user_assignments(rng, u, per_user, days, classes)}
+    return user_data, settings, assignments
+
+
+def write_dataset(directory, users, per_user, days=120, classes=6, seed=0):
+    # writes the three data files into directory, using the app's file names
+    os.makedirs(directory, exist_ok=True)
+    user_data, settings, assignments = make_dataset(users, per_user, days, classes, seed)
+    for filename, data in (("users.json", user_data), ("users_settings.json", settings),
+                           ("assignments.json", assignments)):
+        with open(os.path.join(directory, filename), "w") as f:
+            json.dump(data, f, indent=4)
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=1000, help="number of accounts")
+    parser.add_argument("--per-user", type=int, default=200, help="assignments per account")
+    parser.add_argument("--days", type=int, default=120, help="due dates are spread over this many days")
+    parser.add_argument("--classes", type=int, default=6, help="number of distinct classes")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic assignment tracker data directory.")
+    parser.add_argument("directory")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    write_dataset(args.directory, args.users, args.per_user, args.days, args.classes, args.seed)
+    print(f"Wrote {args.users} users x {args.per_user} assignments to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
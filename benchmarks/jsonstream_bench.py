@@ -0,0 +1,85 @@
+# Compares json.load with the streaming loader for pulling one user out of a big assignments file.
+#
+#   python -m benchmarks.jsonstream_bench --users 20000 --per-user 50
+#
+# Every measurement runs in a fresh interpreter and reads its peak RSS (VmHWM) from /proc, which
+# starts over at exec, so the benchmark's own memory is not counted.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import generate
+from benchmarks.scenarios import REPO_DIR
+from tracker import jsonstream
+
+
+def write_assignments(path, users, per_user):
+    # writes a synthetic assignments.json in the app's layout
+    assignments = generate.make_dataset(users, per_user)[2]
+    with open(path, "w") as f:
+        json.dump(assignments, f, indent=4)
+
+
+def measure(method, path, username):
+    # runs one load in a child process and returns its wall time and peak RSS
+    code = f"""
+import json, resource, sys, time
+
+def peak_rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+sys.path.insert(0, {REPO_DIR!r})
+from tracker import jsonstream
+start = time.perf_counter()
+if {method!r} == "json.load":
+    with open({path!r}) as f:
+        section = json.load(f).get({username!r}, {{}})
+else:
+    jsonstream.STREAMING_THRESHOLD = 0
+    section = jsonstream.load_section({path!r}, {username!r}, {{}})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "max_rss_kb": peak_rss_kb(),
+                  "assignments": len(section.get("assignments", {{}}))}}))
+"""
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.jsonstream_bench",
+                                     description="Compare json.load with the streaming loader for one user's assignments.")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--per-user", type=int, default=50)
+    parser.add_argument("--file", help="use an existing assignments file instead of generating one")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file or os.path.join(tmp, "assignments.json")
+        if not args.file:
+            write_assignments(path, args.users, args.per_user)
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+        if args.file:
+            users = [username for username, _ in jsonstream.iter_items(path)]
+        else:
+            users = [generate.username(u) for u in range(args.users)]
+        for label, username in (("first user", users[0]), ("middle user", users[len(users) // 2]),
+                                ("last user", users[-1])):
+            for method in ("json.load", "streaming"):
+                result = measure(method, path, username)
+                print(f"{label:12} {method:10} {result['seconds'] * 1000:9.1f} ms "
+                      f"{result['max_rss_kb'] / 1024:8.1f} MB peak RSS  ({result['assignments']} assignments)")
+
+
+if __name__ == "__main__":
+    main()
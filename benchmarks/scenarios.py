@@ -0,0 +1,209 @@
+# Timed scenarios for the benchmark runner. Each scenario gets the Context and returns
+# (run, teardown): run is the timed part and teardown (or None) puts the data back afterwards
+# so every repetition sees the same dataset.
+import os
+import subprocess
+import sys
+from itertools import islice
+
+from benchmarks.generate import PASSWORD, username
+from tracker import storage
+from tracker.cache import CachedBackend
+from tracker.index import AssignmentIndex
+from tracker.models import Assignment
+from tracker.sorting import COLUMNS
+
+SCENARIOS = {}
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def scenario(name, ui=False):
+    def register(function):
+        function.ui = ui
+        SCENARIOS[name] = function
+        return function
+    return register
+
+
+class Context:
+    # the generated data directory and the Tk app shared by the scenarios of one run
+    def __init__(self, data_dir, backend="json"):
+        self.data_dir = data_dir
+        self.backend_name = backend
+        self.username = username(0)
+        self._app = None
+
+    def files(self):
+        return (os.path.join(self.data_dir, "users.json"),
+                os.path.join(self.data_dir, "users_settings.json"),
+                os.path.join(self.data_dir, "assignments.json"),
+                os.path.join(self.data_dir, "tracker.db"),
+                os.path.join(self.data_dir, "assignments"))
+
+    def open_backend(self, write_behind=False):
+        return CachedBackend(storage.open_backend(self.backend_name, *self.files()), write_behind=write_behind)
+
+    def app(self):
+        # a withdrawn AssignmentTrackerApp logged in as the benchmark user
+        if self._app is None:
+            os.chdir(self.data_dir)  # main.py opens its data files relative to the working directory
+            os.environ["TRACKER_BACKEND"] = self.backend_name
+            sys.path.insert(0, REPO_DIR)
+            import main
+
+            app = main.AssignmentTrackerApp()
+            app.withdraw()
+            users = main.tracker.users()
+            app.current_user = dict(users[self.username], username=self.username)
+            app.current_user_role = users[self.username]["role"]
+            app.load_user_assignments(self.username)
+            self._app = app
+        return self._app
+
+    def page(self, name):
+        # the page's frame, built on first use like the app does
+        import main
+
+        return self.app().page(getattr(main, name))
+
+    def close(self):
+        if self._app is not None:
+            self._app.destroy()
+            self._app = None
+
+
+# runs in a fresh interpreter so nothing is already imported; fails if the login window pulled in
+# the calendar or image libraries, which should only be imported once their pages are opened
+STARTUP_SCRIPT = """
+import sys
+import main
+
+app = main.AssignmentTrackerApp()
+app.withdraw()
+app.update()
+heavy = sorted(name for name in ("tkcalendar", "PIL") if name in sys.modules)
+assert not heavy, "imported before login: " + ", ".join(heavy)
+app.destroy()
+"""
+
+
+@scenario("startup", ui=True)
+def startup(ctx):
+    # time from starting python to the login window being ready
+    env = dict(os.environ, TRACKER_BACKEND=ctx.backend_name, PYTHONPATH=REPO_DIR)
+
+    def run():
+        subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=ctx.data_dir, env=env, check=True)
+    return run, None
+
+
+@scenario("login")
+def login(ctx):
+    # what LoginPage.signin does with a cold cache: check the password, then load the user's assignments
+    def run():
+        backend = ctx.open_backend()
+        users = backend.load_users()
+        assert users[ctx.username]["password"] == PASSWORD
+        AssignmentIndex(Assignment.from_dict(a, key) for key, a in backend.load_user_assignments(ctx.username).items())
+        backend.close()
+    return run, None
+
+
+@scenario("add")
+def add(ctx):
+    # saving one new assignment, including the write to disk
+    backend = ctx.open_backend()
+    backend.load_user_assignments(ctx.username)
+    new = Assignment("Benchmark", "2025-03-01", "Class 1", "Hw")
+
+    def run():
+        backend.put_assignment(ctx.username, new.id, new.to_dict())
+
+    def teardown():
+        backend.delete_assignment(ctx.username, new.id)
+        backend.close()
+    return run, teardown
+
+
+@scenario("bulk_delete")
+def bulk_delete(ctx):
+    # deleting 200 selected rows the way TablePage.delete_selected does, including the write to disk
+    backend = ctx.open_backend()
+    user_assignments = dict(backend.load_user_assignments(ctx.username))
+    doomed = list(user_assignments)[:200]
+
+    def run():
+        backend.apply([storage.Change("assignments", ctx.username, key, None) for key in doomed])
+
+    def teardown():
+        backend.apply([storage.Change("assignments", ctx.username, key, user_assignments[key]) for key in doomed])
+        backend.close()
+    return run, teardown
+
+
+@scenario("search")
+def search(ctx):
+    # typing a query into the table's search box, one keystroke at a time
+    backend = ctx.open_backend()
+    index = AssignmentIndex(Assignment.from_dict(a, key) for key, a in backend.load_user_assignments(ctx.username).items())
+    index.prepare()
+    backend.close()
+
+    def run():
+        for query in ("e", "es", "ess", "essa", "essay", "essay c", "essay cl", "essay class 1"):
+            matches = index.search.search(query)
+            list(islice((a for a in index if a.id in matches), 200))
+    return run, None
+
+
+@scenario("sort")
+def sort(ctx):
+    # clicking through the table's column headings, each twice, once every column has been sorted by
+    backend = ctx.open_backend()
+    index = AssignmentIndex(Assignment.from_dict(a, key) for key, a in backend.load_user_assignments(ctx.username).items())
+    backend.close()
+    for column in COLUMNS:
+        list(index.sorting.order(column))
+
+    def run():
+        for column in COLUMNS:
+            for reverse in (False, True):
+                list(islice(index.sorting.order(column, reverse), 200))
+    return run, None
+
+
+def page_refresh(page_name):
+    # refreshing a page right after the user's assignments were (re)loaded
+    def make(ctx):
+        app = ctx.app()
+        page = ctx.page(page_name)
+        app.load_user_assignments(ctx.username)
+
+        def run():
+            page.refresh()
+            app.update_idletasks()
+        return run, None
+    return make
+
+
+scenario("calendar_refresh", ui=True)(page_refresh("CalendarPage"))
+scenario("table_refresh", ui=True)(page_refresh("TablePage"))
+scenario("todo_refresh", ui=True)(page_refresh("ToDoPage"))
+scenario("progress_refresh", ui=True)(page_refresh("ProgressPage"))
+
+
+@scenario("navigate", ui=True)
+def navigate(ctx):
+    # clicking through the assignment pages when nothing changed since they were last shown
+    import main
+
+    app = ctx.app()
+    pages = (main.TablePage, main.CalendarPage, main.ToDoPage, main.ProgressPage)
+    for page_class in pages:
+        app.show_page(page_class)
+
+    def run():
+        for page_class in pages:
+            app.show_page(page_class)
+        app.update_idletasks()
+    return run, None
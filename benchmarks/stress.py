@@ -0,0 +1,148 @@
+# Runs many processes against one data directory at the same time and checks that no update is lost.
+#
+#   python -m benchmarks.stress --processes 8 --ops 200 --backend json
+#   python -m benchmarks.stress --backend sharded --write-behind
+#
+# Every process opens its own cached backend (like a second window or the command line would) and
+# mixes reads with three kinds of writes to the same user: adding assignments, toggling the ones it
+# added, and incrementing a shared counter in the user's settings by read-modify-write, retrying
+# when the save reports a ConflictError. At the end every added assignment must be there with the
+# completed flag its process left it with, and the counter must equal the number of increments
+# that were reported as saved. Exits with status 1 when something was lost.
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+
+from tracker import core, storage
+
+USERNAME = "shared"
+
+
+def increment(backend):
+    # adds one to the shared counter; returns how many attempts were rejected as conflicts
+    conflicts = 0
+    while True:
+        current = backend.load_settings().get(USERNAME)
+        record = dict(current, counter=current.get("counter", 0) + 1)
+        try:
+            backend.put_settings(USERNAME, record, storage.record_version(current))
+            if backend.writer is not None:
+                backend.flush()
+                raise_writer_errors(backend)
+            return conflicts
+        except storage.ConflictError:
+            conflicts += 1
+
+
+def raise_writer_errors(backend):
+    error = None
+    while not backend.writer.errors.empty():
+        error = backend.writer.errors.get()
+    if error is not None:
+        raise error
+
+
+def worker(number, data_dir, backend_name, ops, write_behind, results):
+    rng = random.Random(number)
+    tracker = core.Tracker(core.open_backend(data_dir, backend_name, write_behind=write_behind))
+    added = {}  # id -> completed flag this process last saved
+    reads = increments = conflicts = 0
+    try:
+        for op in range(ops):
+            roll = rng.random()
+            if roll < 0.4:
+                len(tracker.assignments(USERNAME))
+                tracker.settings(USERNAME)
+                reads += 1
+            elif roll < 0.65 or not added:
+                a = tracker.add_assignment(USERNAME, f"Process {number} op {op}", "2025-01-01",
+                                           f"Class {number}", "Essay")
+                added[a.id] = False
+            elif roll < 0.8:
+                assignment_id = rng.choice(list(added))
+                added[assignment_id] = not added[assignment_id]
+                tracker.set_completed(USERNAME, [assignment_id], added[assignment_id])
+            else:
+                conflicts += increment(tracker.backend)
+                increments += 1
+        tracker.backend.flush()
+        if write_behind:
+            raise_writer_errors(tracker.backend)
+    finally:
+        tracker.close()
+    results.put((number, added, reads, increments, conflicts))
+
+
+def run(processes, ops, backend_name, write_behind):
+    with tempfile.TemporaryDirectory(prefix="tracker-stress-") as data_dir:
+        tracker = core.Tracker(core.open_backend(data_dir, backend_name))
+        tracker.sign_up("Shared", "User", USERNAME, "password")
+        tracker.close()
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        workers = [context.Process(target=worker, args=(n, data_dir, backend_name, ops, write_behind, results))
+                   for n in range(processes)]
+        start = time.perf_counter()
+        for process in workers:
+            process.start()
+        reports = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+        failed = [process.exitcode for process in workers if process.exitcode != 0]
+
+        tracker = core.Tracker(core.open_backend(data_dir, backend_name))
+        saved = tracker.assignments(USERNAME)
+        counter = tracker.settings(USERNAME).get("counter", 0)
+        tracker.close()
+
+    expected = {}
+    for _, added, *_ in reports:
+        expected.update(added)
+    missing = [i for i in expected if i not in saved.by_id]
+    wrong = [i for i, done in expected.items() if i in saved.by_id and saved.get(i).completed != done]
+    increments = sum(report[3] for report in reports)
+    conflicts = sum(report[4] for report in reports)
+    writes = len(expected) + increments
+
+    print(f"{backend_name}{' (write-behind)' if write_behind else ''}: {processes} processes x {ops} ops "
+          f"in {elapsed:.2f}s, {sum(r[2] for r in reports)} reads, {len(expected)} assignments added, "
+          f"{increments} increments ({conflicts} conflicts retried)")
+    problems = []
+    if failed:
+        problems.append(f"{len(failed)} processes failed")
+    if missing:
+        problems.append(f"{len(missing)} added assignments lost")
+    if wrong:
+        problems.append(f"{len(wrong)} completed flags lost")
+    if counter != increments:
+        problems.append(f"counter is {counter}, expected {increments}")
+    if len(saved) != len(expected):
+        problems.append(f"{len(saved)} assignments saved, expected {len(expected)}")
+    for problem in problems:
+        print(f"  LOST UPDATES: {problem}")
+    if not problems:
+        print(f"  ok: all {writes} writes present")
+    return not problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stress", description="Check that concurrent processes lose no updates.")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200, help="operations per process")
+    parser.add_argument("--backend", action="append", choices=storage.BACKENDS,
+                        help="backend to test, can be repeated (default: all)")
+    parser.add_argument("--write-behind", action="store_true", help="save from a writer thread like the app does")
+    args = parser.parse_args(argv)
+    ok = True
+    for backend_name in args.backend or storage.BACKENDS:
+        ok = run(args.processes, args.ops, backend_name, args.write_behind) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
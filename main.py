@@ -2,102 +2,41 @@ import tkinter as tk #python graphical user interfaces
 from tkinter import ttk #themed tkinter that is more modern
 from tkinter import messagebox
 from tkinter import filedialog #shows popup alert boxes
-from tkcalendar import Calendar 
-from datetime import datetime
-from PIL import Image, ImageTk
 import random
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+
+from tracker import core, instrument, thumbnails
+from tracker.index import AssignmentIndex
+from tracker.models import Assignment, parse_due_date
+from tracker.storage import ConflictError
+from tracker.todo import TodoQueue
 
 
 #Loading past user data
-USER_FILE = "users.json"
-SETTINGS_FILE = "users_settings.json"
-ASSIGNMENTS_FILE = "assignments.json"
-
-def load_users():
-    # Loads the current user data in the users.json file
-    try:
-        with open(USER_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
-    
-def load_settings(): 
-    # Loads the current user settings data in the users_settings.json file
-    try: 
-        with open(SETTINGS_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError,json.JSONDecodeError):
-        return {}
-    
-def load_assignments():
-    # Loads the current assignment data in the assignments.json file
-    try: 
-        with open(ASSIGNMENTS_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
-
-def save_users(users):
-    # saves any user changes to the users.json file
-    with open(USER_FILE, "w") as f: 
-        json.dump(users, f, indent=4)
-
-def save_settings(settings):
-    # saves any setiings changes to the settings.json file
-    with open(SETTINGS_FILE, "w") as f:
-        json.dump(settings, f, indent=4)
-
-def save_assignments(assignments):
-    # saves any assignment changes to the assignments.json file
-    try:
-        with open(ASSIGNMENTS_FILE, "w") as f:
-            json.dump(assignments, f, indent=4)
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to save assignment: {e}")
-
-
-users = load_users()
-settings = load_settings()
-assignments = load_assignments()
-
-
-def is_admin(username):
-    # checks the users role to see if they are an admin
-    return users.get(username, {}).get("role").lower() == "admin" #looks up given username and if user exists checks if they are admin
-
-# Assignment Dataclass
-class Assignment:
-    def __init__(self, title, due_date, class_name, assignment_type, completed=False, priority=False):
-        # Defines the fields for the Assignment class
-        self.title = title
-        self.due_date = due_date 
-        self.class_name = class_name
-        self.assignment_type = assignment_type
-        self.completed = completed
-        self.priority = priority  # add priority to make it go 'to do' list 
-
-    def add_to_user(self, username):
-        # saves an assignment to the user's dictionary in the users.json file
-        assignments = load_assignments()
-        if username not in assignments:
-            assignments[username] = {"assignments": {}}
-        assignments[username]["assignments"][self.title] = self.__dict__
-        save_assignments(assignments)
-        messagebox.showinfo(f"Assignment '{self.title}' saved for user '{username}'.")
-
-    def delete_assignments(username, title):
-        # ensures that when an assignment is deleted, it is also deleted from the assignment.json file
-        assignments = load_assignments()
-        if username in assignments and title in assignments[username]["assignments"]:
-            del assignments[username]["assignments"][title]
-            save_assignments(assignments)
-            return True
-        return False
-    
+USER_FILE = core.USER_FILE
+SETTINGS_FILE = core.SETTINGS_FILE
+ASSIGNMENTS_FILE = core.ASSIGNMENTS_FILE
+DATABASE_FILE = core.DATABASE_FILE
+ASSIGNMENTS_DIR = core.ASSIGNMENTS_DIR
 
+# "json" keeps the original three files, "sqlite" stores every record in its own indexed row and
+# "sharded" gives every user their own assignments file in ASSIGNMENTS_DIR
+# (run `python -m tracker.migrate --to sqlite` or `--to sharded` once to copy the json data over)
+STORAGE_BACKEND = os.environ.get("TRACKER_BACKEND", "json")
 
+# the format the json and sharded backends write: "json" (indented, the original layout),
+# "json-compact", "orjson" or "msgpack"; any of them is read back no matter which one is set
+DATA_FORMAT = os.environ.get("TRACKER_FORMAT", "json")
+
+# every load and save goes through the in-memory cache, which only re-reads a file when it
+# changed on disk; changes are written by a background thread so the window never waits on the disk
+backend = core.open_backend(".", STORAGE_BACKEND, DATA_FORMAT, write_behind=True)
+
+# the sign in, user and assignment operations shared with the command line (python -m tracker)
+tracker = core.Tracker(backend)
 
 class AssignmentTrackerApp(tk.Tk):
     # main application controller
@@ -111,25 +50,79 @@ class AssignmentTrackerApp(tk.Tk):
         # initializes the current user and role for use on other pages
         self.current_user = None
         self.current_user_role = None
-        self.assignments = []
+        self.assignments = AssignmentIndex()
         self.class_colors = {}
 
+        # big data files are read on these threads so the window keeps responding; the results
+        # are handed back to the Tk thread by run_in_background
+        self.loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tracker-loader")
+        self.session = 0 # bumped on logout so results that arrive afterwards are ignored
+
         self.nav_bar = tk.Frame(self, bg="#eee", height=50)
         self.nav_bar.pack(fill="x", side="top")
         
         self.container = tk.Frame(self, bg="white")
         self.container.pack(fill="both", expand=True)
 
+        # pages are only built the first time they are shown (see page()), so the login window
+        # doesn't wait on the calendar widget or on pages the user may never open
         self.frames = {}
-        for PageClass in (LoginPage, HomePage, TablePage, CalendarPage, ToDoPage, ProgressPage, SettingsPage, UsersPage):
-            page_name = PageClass.__name__
-            frame = PageClass(parent=self.container, controller=self)
-            self.frames[page_name] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
 
-        
         self.show_login() # When the application is first ran, the user is shown the login page
 
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        if instrument.ENABLED:
+            # hidden page with the timings, only reachable when profiling is turned on
+            self.bind_all("<Control-Shift-D>", lambda event: self.show_page(DiagnosticsPage))
+        self.after(500, self.report_save_errors)
+
+    def report_save_errors(self):
+        # shows errors from the background writer, which can't open message boxes itself
+        while not backend.writer.errors.empty():
+            error = backend.writer.errors.get()
+            if isinstance(error, ConflictError):
+                messagebox.showerror("Error", f"{error}.\nLog out and back in to see the latest data.")
+            else:
+                messagebox.showerror("Error", f"Failed to save your data: {error}")
+        self.after(500, self.report_save_errors)
+
+    def on_close(self):
+        # writes out any queued changes before the window closes; if that fails the user can keep
+        # the window open (the changes stay queued) instead of losing them without a word
+        try:
+            backend.flush()
+        except Exception as e:
+            if not messagebox.askyesno("Error", f"Failed to save your latest changes: {e}\n\n"
+                                                "Close anyway and lose them?"):
+                return
+        self.loader.shutdown(wait=False, cancel_futures=True)
+        try:
+            backend.close()
+        except Exception:
+            pass  # already reported above
+        self.destroy()
+
+    def run_in_background(self, work, on_done, on_error=None):
+        # runs work() on a loader thread and then on_done(result) (or on_error(exception)) on the
+        # Tk thread, which checks for the result with after() since Tk can't be called from other threads
+        future = self.loader.submit(work)
+        session = self.session
+
+        def check():
+            if not future.done():
+                self.after(20, check)
+                return
+            if session != self.session:
+                return
+            error = future.exception()
+            if error is None:
+                on_done(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                messagebox.showerror("Error", f"Failed to load your data: {error}")
+        self.after(20, check)
+
     def create_nav_bar(self):
             #creates the navigation bar based on the user's role
             for widget in self.nav_bar.winfo_children():
@@ -153,25 +146,18 @@ class AssignmentTrackerApp(tk.Tk):
 
     def load_user_assignments(self, username):
         # loads all of the assignments sotred under the user in the assignment's page to be populated
-        all_assignments = load_assignments()
-        user_assignments = all_assignments.get(username, {}).get("assignments", {})
-
-        self.assignments = [
-            Assignment(
-                title=a["title"],
-                due_date=a["due_date"],
-                class_name=a["class_name"],
-                assignment_type=a["assignment_type"],
-                completed=a.get("completed", False),
-                priority=a.get("priority", False)
-            )
-            for a in user_assignments.values()
-        ]
+        self.assignments = tracker.assignments(username)
+
+    def save_assignment(self, assignment):
+        # saves a new or edited assignment for the current user
+        tracker.save_assignment(self.current_user["username"], assignment)
 
     def logout(self):
         # logs the user out and shows the login page
         self.current_user = None
         self.current_user_role = None
+        self.session += 1
+        backend.flush(wait=False) # starts saving anything still queued without blocking the window
         messagebox.showinfo("Logged Out", "You have been logged out")
         self.show_login()
 
@@ -184,12 +170,23 @@ class AssignmentTrackerApp(tk.Tk):
         # hides the navigation bar
         self.nav_bar.pack_forget()
 
+    def page(self, page_class):
+        # returns the page's frame, creating it the first time it is needed
+        frame = self.frames.get(page_class.__name__)
+        if frame is None:
+            frame = page_class(parent=self.container, controller=self)
+            frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[page_class.__name__] = frame
+        return frame
+
     def show_page(self, page_class):
         # used to show a specific page of the assignment tracker
-        frame = self.frames[page_class.__name__]
-        frame.tkraise()
-        if hasattr(frame, 'refresh'):
-            frame.refresh()
+        username = self.current_user["username"] if self.current_user else "-"
+        with instrument.span(f"show_page {page_class.__name__} ({username})"):
+            frame = self.page(page_class)
+            frame.tkraise()
+            if hasattr(frame, 'refresh'):
+                frame.refresh()
 
     
     # The functions below are used to make navigating between the various pages of the tracker much easier
@@ -218,9 +215,14 @@ class LoginPage(tk.Frame):
         self.entry_username.grid(row=0, column=1, padx=10, pady=10)
         self.entry_password.grid(row=1, column=1, padx=10, pady=10)
 
-        tk.Button(self, text="Sign In", command=self.signin).grid(row=2, column=0, pady=10, padx=10) # Sign In Button
+        self.signin_button = tk.Button(self, text="Sign In", command=self.signin)
+        self.signin_button.grid(row=2, column=0, pady=10, padx=10) # Sign In Button
         tk.Button(self, text="Sign Up", command=lambda: SignUpPage(self)).grid(row=2, column=1, pady=10, padx=10) # Sign Up Button
         tk.Button(self, text="Forgot Password?", command=self.forgot_password).grid(row=2, column=2, pady=10, padx=10) # Forgot Password Button
+
+        # shown while the user's data loads in the background after they press Sign In
+        self.status_label = tk.Label(self, text="", bg="white")
+        self.spinner = ttk.Progressbar(self, mode="indeterminate", length=200)
         
 
     def forgot_password(self):
@@ -243,63 +245,79 @@ class LoginPage(tk.Frame):
 
         def reset():
             # this funtion actually replaces the password in the user.json and the users.settings.json files
-            username = entry_username.get()
-            new_password = entry_new_password.get()
-            confirm_password = entry_confirmation.get()
-            users = load_users()
-            settings = load_settings()
-
-            if username in users:
-                if new_password == confirm_password:
-                    users[username]["password"] = new_password
-                    settings[username]["password"] = new_password
-
-                    save_users(users)
-                    save_settings(settings)
+            try:
+                tracker.reset_password(entry_username.get(), entry_new_password.get(), entry_confirmation.get())
+            except core.TrackerError as e:
+                messagebox.showerror("Error", str(e))
+                return
 
-                    messagebox.showinfo("Success", "Password updated successfully")
-                    reset_window.destroy()
-
-                else:
-                    messagebox.showerror("Error", "Passwords do not match. Please try again")
-            else:
-                messagebox.showerror("Error", "Username not found.")
+            messagebox.showinfo("Success", "Password updated successfully")
+            reset_window.destroy()
 
         tk.Button(reset_window, text="Reset", command=reset).pack(pady=10).grid(row=0, column=1)
 
    
 
     def signin(self):
-        # responsible for signing the user in by checking the username and password stored in the user.json file
+        # responsible for signing the user in by checking the username and password stored in the user.json file;
+        # the files are read on a loader thread while a spinner shows that the sign in is in progress
         username = self.entry_username.get()
         password = self.entry_password.get()
-        users = load_users()
-
-        if username in users and users[username]["password"] == password:
-            self.controller.current_user = users[username]
-            self.controller.current_user["username"] = username
-            messagebox.showinfo("Success", "Login successful!")
-
-            self.controller.load_user_assignments(username)
-
-            self.controller.current_user_role = users[username]["role"]
-            self.controller.create_nav_bar()
-            self.controller.show_nav_bar()
-
-
-            default_view = settings.get(username, {}).get("default_view", "Home")
-            page_mapping = {
-                "Home": HomePage, 
-                "Table": TablePage,
-                "Calendar": CalendarPage,
-                "Todo": ToDoPage,
-                "Progress": ProgressPage,
-                
-            }
-            self.controller.show_page(page_mapping.get(default_view))
 
+        def load():
+            # runs on the loader thread: everything the first page needs
+            user = tracker.authenticate(username, password)
+            if user is None:
+                return None
+            assignments = tracker.assignments(username)
+            assignments.prepare()
+            return user, assignments, tracker.default_view(username)
+
+        self.set_loading(True)
+        self.controller.run_in_background(load, self.finish_signin, self.signin_failed)
+
+    def set_loading(self, loading):
+        # shows or hides the spinner and stops the user from pressing Sign In twice
+        if loading:
+            self.signin_button.config(state="disabled")
+            self.status_label.config(text="Signing in...")
+            self.status_label.grid(row=3, column=0, columnspan=3, pady=(10, 0))
+            self.spinner.grid(row=4, column=0, columnspan=3, pady=5)
+            self.spinner.start(10)
         else:
+            self.spinner.stop()
+            self.spinner.grid_remove()
+            self.status_label.grid_remove()
+            self.signin_button.config(state="normal")
+
+    def finish_signin(self, result):
+        # back on the Tk thread with the loaded data
+        self.set_loading(False)
+        if result is None:
             messagebox.showerror("Error", "Invalid credentials.")
+            return
+
+        user, assignments, default_view = result
+        self.controller.current_user = user
+        self.controller.current_user_role = user["role"]
+        self.controller.assignments = assignments
+        self.controller.create_nav_bar()
+        self.controller.show_nav_bar()
+
+        page_mapping = {
+            "Home": HomePage, 
+            "Table": TablePage,
+            "Calendar": CalendarPage,
+            "Todo": ToDoPage,
+            "Progress": ProgressPage,
+            
+        }
+        self.controller.show_page(page_mapping.get(default_view, HomePage))
+        messagebox.showinfo("Success", "Login successful!")
+
+    def signin_failed(self, error):
+        self.set_loading(False)
+        messagebox.showerror("Error", f"Failed to load your data: {error}")
 
 
 class SignUpPage(tk.Toplevel):
@@ -338,45 +356,20 @@ class SignUpPage(tk.Toplevel):
         tk.Button(self, text="Register", command=self.signup).pack(pady=10)
 
     def signup(self):
-        # responsible for adding the new user to the users.json file
-        users = load_users()
-        first_name = self.entry_first_name.get()
-        last_name = self.entry_last_name.get()
-        username = self.entry_username.get()
-        password = self.entry_password.get()
-        confirm_password = self.entry_confirm_password.get()
-        role = self.role.get()
-
-        if not all([first_name, last_name, username, password, confirm_password]):
-            # ensures that new users fill out all of the required fields on the sign up page
-            messagebox.showerror("Error", "All fields must be filled.")
-            return
-        if password != confirm_password: # ensures that the passwords match each other
-            messagebox.showerror("Error", "Passwords do not match.")
-            return
-        if username in users: # ensures that the username is not already in use
-            messagebox.showerror("Error", "Username already exists.")
+        # responsible for adding the new user to the users.json and user_settings.json files
+        try:
+            tracker.sign_up(
+                self.entry_first_name.get(),
+                self.entry_last_name.get(),
+                self.entry_username.get(),
+                self.entry_password.get(),
+                self.entry_confirm_password.get(),
+                self.role.get()
+            )
+        except core.TrackerError as e:
+            messagebox.showerror("Error", str(e))
             return
 
-        # adds the new user to the users.json file
-        users[username] = {
-            "first_name": first_name,
-            "last_name": last_name,
-            "password": password,
-            "role": role
-        }
-
-        # adds the new user to the user_settings.json
-        settings[username] = {
-            "password": password,
-            "first_name": first_name,
-            "last_name": last_name,
-            "profile_picture": "",
-            "default_view": ""
-        }
-
-        save_users(users)
-        save_settings(users)
         messagebox.showinfo("Success", "Account created successfully!") # shows users a confirmation that their user profile was created
         self.destroy() # closes the sign up window
 
@@ -398,7 +391,11 @@ class UsersPage(tk.Frame):
         tk.Label(self, text="Select a User to Delete:", bg="white").pack(pady=10)
         self.user_dropdown = ttk.Combobox(self)
         self.user_dropdown.pack(pady=10)
-        self.load_users_for_dropdown()
+        self.user_dropdown.bind("<<ComboboxSelected>>", lambda event: self.show_user_progress())
+
+        # the selected user's completion counts
+        self.user_progress_label = tk.Label(self, text="", bg="white")
+        self.user_progress_label.pack(pady=5)
 
         tk.Button(self, text="Delete User", command=self.delete_user_prompt, bg="red").pack(pady=10) # delete user button
 
@@ -409,43 +406,53 @@ class UsersPage(tk.Frame):
         
 
         
+    def refresh(self):
+        self.load_users_for_dropdown()
+
     def load_users_for_dropdown(self):
-        # Populates the dropdown with the users' usernames
-        users = load_users()
-        self.user_dropdown["values"] = list(users.keys())
-        if users:
-            self.user_dropdown.current(0)
+        # Populates the dropdown with the users' usernames, read on a loader thread
+        self.user_dropdown.set("Loading users...")
+        self.user_dropdown.config(state="disabled")
+
+        def show(usernames):
+            self.user_dropdown.config(state="normal")
+            self.user_dropdown["values"] = usernames
+            self.user_dropdown.set("")
+            if usernames:
+                self.user_dropdown.current(0)
+            self.show_user_progress()
+        self.controller.run_in_background(lambda: list(tracker.users()), show)
+
+    def show_user_progress(self):
+        # shows how far along the selected user is, loading their assignments on a loader thread
+        username = self.user_dropdown.get()
+        if not username:
+            self.user_progress_label.config(text="")
+            return
+
+        def show(progress):
+            if self.user_dropdown.get() == username:
+                self.user_progress_label.config(
+                    text=f"{username}: completed {progress.completed} of {progress.total} assignments ({progress.percent():.1f}%)")
+        self.user_progress_label.config(text="Loading progress...")
+        self.controller.run_in_background(lambda: tracker.progress(username), show)
 
     def delete_user_prompt(self):
         # Confirm and delete selected user
         username = self.user_dropdown.get()
 
-        if not username: 
+        if not username or str(self.user_dropdown["state"]) == "disabled": # nothing picked, or still loading
             messagebox.showerror("Error", "No user selected.")
             return
             
         confirm = messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete '{username}'? This action cannot be undone.")
         if confirm:
-            users = load_users()
-
-            # deletes users from users.json file
-            if username in users:
-                del users[username]
-                save_users(users)
-
-            # deletes users from assignments.json file
-            assignments = load_assignments()
-            if username in assignments:
-                del assignments[username]
-                save_assignments(assignments)
-
-            # deletes users from users_settings.json file
-            settings = load_settings()
-            if username in settings:
-                del settings[username]
-                save_settings(settings)
-
-                
+            # deletes the user together with their assignments and settings
+            try:
+                tracker.delete_user(username)
+            except core.TrackerError as e:
+                messagebox.showerror("Error", str(e))
+                return
 
             messagebox.showinfo("Success", f"User '{username}' has been deleted successfully.")
             self.load_users_for_dropdown()
@@ -459,7 +466,27 @@ class UsersPage(tk.Frame):
         
 
 
-class TablePage(tk.Frame):
+class AssignmentsView:
+    # Mixin for the pages that show the controller's assignments. It remembers which collection
+    # and version the page last showed, so refresh() can skip the work when nothing changed and
+    # otherwise only handle the assignments that did.
+    synced_index = None
+    synced_version = 0
+
+    def pending_changes(self):
+        # ids changed since the page was last synced ([] when it is up to date), or None if the
+        # page has to be rebuilt (a different user logged in or the change log moved on)
+        index = self.controller.assignments
+        if index is not self.synced_index:
+            return None
+        return index.changes_since(self.synced_version)
+
+    def mark_synced(self):
+        self.synced_index = self.controller.assignments
+        self.synced_version = self.controller.assignments.version
+
+
+class TablePage(AssignmentsView, tk.Frame):
     # Class that creates the TablePage and houses all of the function related to the page
     def __init__(self, parent, controller):
         super().__init__(parent, bg="white")
@@ -485,45 +512,268 @@ class TablePage(tk.Frame):
                                 command=self.open_add_assignment_popup)
         plus_button.pack(side="right", padx=10)
 
-        # Treeview
+        # Imports a .csv or .ics file of assignments (e.g. a course syllabus export)
+        self.import_button = tk.Button(top_frame, text="Import...", command=self.import_file)
+        self.import_button.pack(side="right", padx=10)
+        self.import_session = None
+
+        # Search box: narrows the table to the assignments whose title, class or type has words
+        # starting with every word typed
+        search_frame = tk.Frame(self, bg="white")
+        search_frame.pack(fill="x", padx=20, pady=(10, 0))
+        tk.Label(search_frame, text="Search:", bg="white").pack(side="left")
+        self.search_text = tk.StringVar()
+        tk.Entry(search_frame, textvariable=self.search_text, width=40).pack(side="left", padx=5)
+        self.search_text.trace_add("write", lambda *args: self.apply_view())
+
+        # Filters, combined with each other and with the search
+        filter_frame = tk.Frame(self, bg="white")
+        filter_frame.pack(fill="x", padx=20, pady=(5, 0))
+        self.filter_vars = {}
+        for name, label, width, values in (
+            ("class_name", "Class:", 14, self.class_choices),
+            ("assignment_type", "Type:", 10, self.type_choices),
+            ("completed", "Completed:", 5, lambda: ["Any", "Yes", "No"]),
+            ("priority", "★:", 5, lambda: ["Any", "Yes", "No"]),
+        ):
+            tk.Label(filter_frame, text=label, bg="white").pack(side="left")
+            var = tk.StringVar(value="Any")
+            box = ttk.Combobox(filter_frame, textvariable=var, width=width, state="readonly")
+            box.configure(postcommand=lambda box=box, values=values: box.configure(values=values()))
+            box.bind("<<ComboboxSelected>>", lambda event: self.apply_view())
+            box.pack(side="left", padx=(2, 8))
+            self.filter_vars[name] = var
+        self.date_entries = {}
+        for name, label in (("due_from", "From:"), ("due_to", "To:")):
+            tk.Label(filter_frame, text=label, bg="white").pack(side="left")
+            entry = tk.Entry(filter_frame, width=11)
+            entry.bind("<Return>", lambda event: self.apply_view())
+            entry.bind("<FocusOut>", lambda event: self.apply_view())
+            entry.pack(side="left", padx=(2, 8))
+            self.date_entries[name] = entry
+        tk.Button(filter_frame, text="Clear", command=self.clear_filters).pack(side="left")
+
+        # Treeview; clicking a heading sorts by that column, clicking it again reverses the order
+        self.columns = {
+            "Priority": ("priority", "★"),
+            "Title": ("title", "Title"),
+            "Due Date": ("due_date", "Due Date"),
+            "Class": ("class_name", "Class Name"),
+            "Type": ("assignment_type", "Type"),
+            "Completed": ("completed", "Completed"),
+        }
         self.tree = ttk.Treeview(
             self,
-            columns=("Priority", "Title", "Due Date", "Class", "Type", "Completed"),
+            columns=tuple(self.columns),
             show="headings"
         )
-        self.tree.heading("Priority", text="★")
-        self.tree.heading("Title", text="Title")
-        self.tree.heading("Due Date", text="Due Date")
-        self.tree.heading("Class", text="Class Name")
-        self.tree.heading("Type", text="Type")
-        self.tree.heading("Completed", text="Completed")
+        for column, (field, text) in self.columns.items():
+            self.tree.heading(column, text=text, command=lambda field=field: self.sort_by(field))
+        self.sort_column = None # field the table is sorted by, None for the order the assignments were added in
+        self.sort_reverse = False
 
         self.tree.pack(fill="both", expand=True, pady=10)
 
-    def refresh(self):
-        # updates the table page
-        self.tree.delete(*self.tree.get_children())
-
-        for a in self.controller.assignments:
-            # Assign color if new class
-            if a.class_name not in self.controller.class_colors:
-                self.controller.class_colors[a.class_name] = self.generate_random_color()
-
-            row_color = self.controller.class_colors[a.class_name]
-
-        # populates the table with assignments that were previously added from the assignments.json file
-        for a in self.controller.assignments:
-            self.tree.insert("", "end", values=(
-                "★" if a.priority else "",
+        # Page controls, only shown when the table is too big to show every row at once
+        self.pager = tk.Frame(self, bg="white")
+        tk.Button(self.pager, text="< Prev", command=lambda: self.change_page(-1)).pack(side="left", padx=10)
+        self.page_label = tk.Label(self.pager, text="", bg="white")
+        self.page_label.pack(side="left", padx=10)
+        tk.Button(self.pager, text="Next >", command=lambda: self.change_page(1)).pack(side="left", padx=10)
+
+        self.page = 0
+        self.paged = False
+        self.rows = {} # item id -> (values, tag) of every row currently in the tree, in tree order
+        self.configured_tags = set()
+
+    PAGE_SIZE = 200 # rows shown at once in paged mode
+    PAGED_THRESHOLD = 500 # tables with more assignments than this switch to paged mode
+
+    def row_id(self, a):
+        # the tree item id of an assignment is its own id
+        return a.id
+
+    def row_values(self, a):
+        # the values shown in the assignment's row
+        return (
+            "★" if a.priority else "",
             a.title,
             a.due_date,
             a.class_name,
             a.assignment_type,
             "Yes" if a.completed else "No"
-            ))
+        )
 
+    @instrument.timed()
+    def refresh(self):
+        # updates the table page, only touching the rows that changed
+        if self.import_session is not None and self.import_session != self.controller.session:
+            # an import from before the last logout never came back to this page
+            self.import_button.config(state="normal", text="Import...")
+            self.import_session = None
+        changed = self.pending_changes()
+        if changed == []:
+            return
+        if changed is not None and not self.paged and not self.search_text.get().strip() \
+                and self.sort_column is None and not self.filters() and len(self.controller.assignments) <= self.PAGED_THRESHOLD:
+            self.apply_changes(changed)
+        else:
+            self.rebuild()
+        self.mark_synced()
+
+    def apply_changes(self, changed):
+        # applies just the added, edited and removed assignments to the tree
+        for assignment_id in changed:
+            a = self.controller.assignments.get(assignment_id)
+            if a is None:
+                if self.rows.pop(assignment_id, None) is not None:
+                    self.tree.delete(assignment_id)
+                continue
+            self.configure_tag(a.class_name)
+            row = (self.row_values(a), a.class_name)
+            old = self.rows.get(assignment_id)
+            if old is None:
+                # new assignments come last in the controller's order, so they go at the end
+                self.tree.insert("", "end", iid=assignment_id, values=row[0], tags=(row[1],))
+            elif old != row:
+                self.tree.item(assignment_id, values=row[0], tags=(row[1],))
+            self.rows[assignment_id] = row
+
+    def configure_tag(self, class_name):
+        # gives each class its color the first time it shows up in the table
+        if class_name not in self.controller.class_colors:
+            self.controller.class_colors[class_name] = self.generate_random_color()
+        if class_name not in self.configured_tags:
+            self.tree.tag_configure(class_name, background=self.controller.class_colors[class_name])
+            self.configured_tags.add(class_name)
+
+    def visible_assignments(self):
+        # (iterator, count) of the assignments the table shows: the ones matching the search box
+        # and the filters, in the sorted column's order (or the order they were added in)
+        assignments = self.controller.assignments
+        if self.sort_column is None:
+            shown = iter(assignments)
+        else:
+            shown = assignments.sorting.order(self.sort_column, self.sort_reverse)
+        count = len(assignments)
+
+        matches = assignments.search.search(self.search_text.get())
+        if matches is not None:
+            shown = (a for a in shown if a.id in matches)
+            count = len(matches)
+
+        filters = self.filters()
+        if filters:
+            # the number of matches is only known after going through them all
+            shown = list(core.filter_assignments(shown, **filters))
+            count = len(shown)
+            shown = iter(shown)
+        return shown, count
+
+    def filters(self):
+        # the filter bar's choices as keyword arguments for core.filter_assignments
+        filters = {}
+        for name, var in self.filter_vars.items():
+            value = var.get()
+            if value == "Any":
+                continue
+            if name in ("completed", "priority"):
+                value = value == "Yes"
+            filters[name] = value
+        for name, entry in self.date_entries.items():
+            text = entry.get().strip()
+            due = parse_due_date(text)
+            entry.config(bg="#fdd" if text and due is None else "white") # marks dates that can't be read
+            if due is not None:
+                filters[name] = due
+        return filters
+
+    def class_choices(self):
+        return ["Any"] + sorted(self.controller.assignments.by_class)
+
+    def type_choices(self):
+        return ["Any"] + sorted(self.controller.assignments.progress.by_type)
+
+    def clear_filters(self):
+        for var in self.filter_vars.values():
+            var.set("Any")
+        for entry in self.date_entries.values():
+            entry.delete(0, tk.END)
+        self.apply_view()
+
+    def sort_by(self, field):
+        # sorts by a column, or reverses the order when it is already sorted by it; the rows are
+        # moved in the tree rather than recreated
+        if self.sort_column == field:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = field, False
+        for column, (column_field, text) in self.columns.items():
+            arrow = (" ▼" if self.sort_reverse else " ▲") if column_field == field else ""
+            self.tree.heading(column, text=text + arrow)
+        self.apply_view()
+
+    def apply_view(self):
+        # shows the table again after the search, a filter or the sort order changed
+        self.page = 0
+        self.rebuild()
+        self.mark_synced()
+
+    def rebuild(self):
+        # brings the whole table (or the current page of it) in line with the controller
+        assignments, count = self.visible_assignments()
+
+        if count > self.PAGED_THRESHOLD:
+            # paged mode: only the rows of the current page are put in the tree
+            pages = (count - 1) // self.PAGE_SIZE + 1
+            self.page = min(self.page, pages - 1)
+            start = self.page * self.PAGE_SIZE
+            assignments = list(islice(assignments, start, start + self.PAGE_SIZE))
+            self.page_label.config(text=f"Page {self.page + 1} of {pages}")
+            self.pager.pack(pady=(0, 10))
+            self.paged = True
+        else:
+            self.page = 0
+            self.pager.pack_forget()
+            self.paged = False
+            assignments = list(assignments)
+
+        self.sync_rows(assignments)
+
+    def change_page(self, step):
+        # moves to the previous or next page in paged mode
+        self.page = max(self.page + step, 0)
+        self.rebuild()
+        self.mark_synced()
+
+    def sync_rows(self, assignments):
+        # makes the tree show exactly these assignments by inserting, updating, moving and
+        # removing only the rows that differ from what is already there
+        wanted = {}
+        for a in assignments:
+            self.configure_tag(a.class_name)
+            wanted[self.row_id(a)] = (self.row_values(a), a.class_name)
+
+        stale = [iid for iid in self.rows if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+
+        # rows that stay only need moving if their order changed
+        kept_before = [iid for iid in self.rows if iid in wanted]
+        kept_after = [iid for iid in wanted if iid in self.rows]
+        reordered = kept_before != kept_after
+
+        for index, (iid, row) in enumerate(wanted.items()):
+            old = self.rows.get(iid)
+            if old is None:
+                self.tree.insert("", index, iid=iid, values=row[0], tags=(row[1],))
+                continue
+            if old != row:
+                self.tree.item(iid, values=row[0], tags=(row[1],))
+            if reordered:
+                self.tree.move(iid, "", index)
 
-            self.tree.tag_configure(a.class_name, background=row_color)
+        self.rows = wanted
 
     def generate_random_color(self):
         # generates a random color to color code the different classes
@@ -553,6 +803,11 @@ class TablePage(tk.Frame):
         def save():
             # adds the assignement to both the user dictionary in the assignment file and to the ongoing list of assignments
             username = self.controller.current_user["username"]
+            try:
+                core.validate_assignment(entries["Title"].get(), entries["Due Date"].get())
+            except core.TrackerError as e:
+                messagebox.showerror("Error", str(e), parent=popup)
+                return
             new_assignment = Assignment(
                 entries["Title"].get(),
                 entries["Due Date"].get(),
@@ -561,13 +816,48 @@ class TablePage(tk.Frame):
                 completed=completed_var.get(),
                 priority=priority_var.get()
             )
-            self.controller.assignments.append(new_assignment)
-            new_assignment.add_to_user(username)
+            self.controller.assignments.add(new_assignment)
+            self.controller.save_assignment(new_assignment)
+            messagebox.showinfo(f"Assignment '{new_assignment.title}' saved for user '{username}'.")
             self.refresh()
             popup.destroy()
 
         tk.Button(popup, text="Add", command=save, bg="#4CAF50", fg="black").pack(pady=10) # creates the add button that users click to run the above functionality
 
+    def import_file(self):
+        # adds every assignment of a .csv or .ics file with one save; the file is read, checked
+        # and saved on a loader thread, then the new rows are added to the table
+        path = filedialog.askopenfilename(title="Import assignments", filetypes=[
+            ("Assignments", "*.csv *.ics"), ("CSV", "*.csv"), ("iCalendar", "*.ics"), ("All files", "*.*")])
+        if not path:
+            return
+        username = self.controller.current_user["username"]
+        name = os.path.basename(path)
+        self.import_button.config(state="disabled", text="Importing...")
+        self.import_session = self.controller.session
+
+        def done(result):
+            added, errors = result
+            self.import_button.config(state="normal", text="Import...")
+            self.import_session = None
+            for a in added:
+                self.controller.assignments.add(a)
+            self.refresh()
+            message = f"Imported {len(added)} assignment(s) from {name}."
+            if not errors:
+                messagebox.showinfo("Import", message)
+                return
+            skipped = "\n".join(f"Line {line}: {error}" for line, error in errors[:10])
+            if len(errors) > 10:
+                skipped += f"\n... and {len(errors) - 10} more"
+            messagebox.showwarning("Import", f"{message}\nSkipped {len(errors)} row(s):\n{skipped}")
+
+        def failed(error):
+            self.import_button.config(state="normal", text="Import...")
+            self.import_session = None
+            messagebox.showerror("Import", str(error))
+        self.controller.run_in_background(lambda: tracker.import_file(username, path), done, failed)
+
     def delete_selected(self):
         # allows users to deleted the selected assignments from both the table view and the assignments.json
         selected_items = self.tree.selection()
@@ -575,31 +865,25 @@ class TablePage(tk.Frame):
             messagebox.showwarning("No Selection", "Please select an assignment to delete.")
             return
         
-        assignments = load_assignments()
+        username = self.controller.current_user["username"]
 
+        # the tree item ids are the assignment ids, so each row is found directly
         for item in selected_items:
-            values = self.tree.item(item, "values")
-            title, due_date = values[1], values[2]
+            self.controller.assignments.remove(item)
 
-            self.controller.assignments = [
-                a for a in self.controller.assignments
-                if not (a.title == title and a.due_date == due_date)
-            ]
-
-            for username, user_data in assignments.items():
-                user_assignments = user_data.get("assignments", {})
-                for assignment_title, details in list(user_assignments.items()):
-                    if details.get("title") == title and details.get("due_date") == due_date:
-                        del user_assignments[assignment_title]
-                        save_assignments(assignments)
+        self.tree.delete(*selected_items)
+        for item in selected_items:
+            self.rows.pop(item, None)
 
-            self.tree.delete(item)
+        # all of the deletions are saved together
+        tracker.delete_assignments(username, selected_items)
+        self.refresh()
 
 
         messagebox.showinfo("Deleted", "Selected assignment(s) deleted.")
 
     def edit_selected(self):
-        # edits the assignments in the table only
+        # edits the selected assignment and saves the changes
         selected = self.tree.selection()
         if not selected:
             messagebox.showwarning("No Selection", "Please select an assignment to edit.")
@@ -607,7 +891,6 @@ class TablePage(tk.Frame):
 
         item = selected[0]
         values = self.tree.item(item, "values")
-        title, due_date = values[1], values[2]
 
         popup = tk.Toplevel(self)
         popup.title("Edit Assignment")
@@ -630,33 +913,37 @@ class TablePage(tk.Frame):
         tk.Checkbutton(popup, text="Mark as Priority (★)", variable=priority_var).pack(pady=5)
 
         def save():
-            # saves the assignments to the controller list, not to the assignments.json file
-            self.controller.assignments = [
-                a for a in self.controller.assignments
-                if not (a.title == title and a.due_date == due_date)
-            ]
-
+            # replaces the assignment (same id) in the controller's index and in the storage backend
+            try:
+                core.validate_assignment(entries["Title"].get(), entries["Due Date"].get())
+            except core.TrackerError as e:
+                messagebox.showerror("Error", str(e), parent=popup)
+                return
             updated = Assignment(
                 entries["Title"].get(),
                 entries["Due Date"].get(),
                 entries["Class Name"].get(),
                 entries["Type"].get(),
                 completed=completed_var.get(),
-                priority=priority_var.get()
+                priority=priority_var.get(),
+                assignment_id=item,
+                version=self.controller.assignments.get(item).version
             )
 
-            self.controller.assignments.append(updated)
+            self.controller.assignments.replace(updated)
+            self.controller.save_assignment(updated)
             self.refresh()
             popup.destroy()
 
         tk.Button(popup, text="Save", command=save, bg="#f0ad4e", fg="white").pack(pady=10)
 
 
-class CalendarPage(tk.Frame):
+class CalendarPage(AssignmentsView, tk.Frame):
     # Class that creates the CalendarPage and houses all of the function related to the page
     def __init__(self, parent, controller):
         super().__init__(parent, bg="white")
         self.controller = controller
+        from tkcalendar import Calendar # imported on first use so startup doesn't pay for it
 
         # Title
         tk.Label(self, text="Assignment Calendar", font=("Courier New", 20), bg="white").pack(pady=10)
@@ -704,38 +991,82 @@ class CalendarPage(tk.Frame):
 
         # Event binding?
         self.calendar.bind("<<CalendarSelected>>", self.show_assignments_for_selected_date)
+        self.calendar.bind("<<CalendarMonthChanged>>", lambda event: self.refresh_events())
+        self.calendar.tag_config('due', background='red', foreground='white')
+
+        self.events = {} # assignment id -> (calendar event id, due date, title) of the events on the calendar
 
+    @instrument.timed()
     def refresh(self):
-        # updates the calendar upon reload
+        # updates the calendar upon reload, if any assignments changed since it was last shown
+        changed = self.pending_changes()
+        if changed == []:
+            return
         self.assignment_listbox.delete(0, tk.END)
-        self.calendar.calevent_remove('all')
-
-        for a in self.controller.assignments:
-
-            
-            try:
-                due_date = datetime.strptime(a.due_date, "%Y-%m-%d")
-                self.calendar.calevent_create(due_date, f"{a.title}", 'due')
-            except ValueError:
+        if changed is None:
+            self.refresh_events()
+        else:
+            self.apply_changes(changed)
+        self.mark_synced()
+
+    def apply_changes(self, changed):
+        # moves, renames or removes the events of just the assignments that changed
+        visible = set(self.visible_months())
+        for assignment_id in changed:
+            a = self.controller.assignments.get(assignment_id)
+            old = self.events.get(assignment_id)
+            if old is not None:
+                if a is not None and (a.due_date, a.title) == old[1:]:
+                    continue
+                self.calendar.calevent_remove(old[0])
+                del self.events[assignment_id]
+            if a is not None and a.due is not None and (a.due.year, a.due.month) in visible:
+                event_id = self.calendar.calevent_create(a.due, f"{a.title}", 'due')
+                self.events[assignment_id] = (event_id, a.due_date, a.title)
+
+    def visible_months(self):
+        # the month shown on the calendar together with the months before and after it
+        month, year = self.calendar.get_displayed_month()
+        months = []
+        for step in (-1, 0, 1):
+            y, m = divmod(year * 12 + (month - 1) + step, 12)
+            months.append((y, m + 1))
+        return months
+
+    def refresh_events(self):
+        # only keeps events for the visible months, creating or removing just the ones that changed
+        wanted = {}
+        for year, month in self.visible_months():
+            for a in self.controller.assignments.due_in_month(year, month):
+                wanted[a.id] = a
+
+        for assignment_id, (event_id, due_date, title) in list(self.events.items()):
+            a = wanted.get(assignment_id)
+            if a is None or (a.due_date, a.title) != (due_date, title):
+                self.calendar.calevent_remove(event_id)
+                del self.events[assignment_id]
+
+        for assignment_id, a in wanted.items():
+            if assignment_id in self.events:
                 continue
-
-        self.calendar.tag_config('due', background='red', foreground='white')
+            if a.due is None:
+                continue
+            event_id = self.calendar.calevent_create(a.due, f"{a.title}", 'due')
+            self.events[assignment_id] = (event_id, a.due_date, a.title)
 
     def show_assignments_for_selected_date(self, event):
-        # filters the assignments so that only the ones due on a given date are shown
+        # shows the assignments due on the selected date, looked up in the controller's date index
         selected_date = self.calendar.get_date()
         self.assignment_listbox.delete(0, tk.END)
-        found = False
 
-        for a in self.controller.assignments:
-            if a.due_date == selected_date:
-                self.assignment_listbox.insert(tk.END, f"{a.title} - {a.class_name} - {a.assignment_type}")
-                found = True
+        due = self.controller.assignments.due_on(selected_date)
+        for a in due:
+            self.assignment_listbox.insert(tk.END, f"{a.title} - {a.class_name} - {a.assignment_type}")
 
-        if not found:
+        if not due:
             self.assignment_listbox.insert(tk.END, "No assignments due on this date.")
 
-class ToDoPage(tk.Frame):
+class ToDoPage(AssignmentsView, tk.Frame):
     # Class that creates the ToDoPage and houses all of the function related to the page
     def __init__(self, parent, controller):
         super().__init__(parent, bg="white")
@@ -743,30 +1074,66 @@ class ToDoPage(tk.Frame):
 
         tk.Label(self, text="To-Do List", font=("Helvetica", 20), bg="white").pack(pady=10)
 
-        self.todo_listbox = tk.Listbox(self, width=80, height=20)
-        self.todo_listbox.pack(padx=20, pady=10)
-
-        self.refresh()
+        self.count_label = tk.Label(self, text="", bg="white")
+        self.count_label.pack()
 
-    def refresh(self):
-        self.todo_listbox.delete(0, tk.END)
+        list_frame = tk.Frame(self, bg="white")
+        list_frame.pack(padx=20, pady=10)
+        self.todo_listbox = tk.Listbox(list_frame, width=80, height=20, yscrollcommand=self.on_scroll)
+        self.scrollbar = tk.Scrollbar(list_frame, command=self.todo_listbox.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.todo_listbox.pack(side="left")
 
-        # Separate starred and non-starred assignments
-        starred = []
-        regular = []
+        self.todo = TodoQueue()
+        self.limit = self.PAGE_SIZE # rows loaded into the listbox so far
+        self.shown = [] # (assignment id, row text) of every row in the listbox
 
-        for a in self.controller.assignments:
-            item_str = f"★ {a.title}" if getattr(a, "starred", False) else a.title
-            display = f"{item_str} - {a.class_name} - {a.due_date}"
-            if getattr(a, "starred", False):
-                starred.append(display)
-            else:
-                regular.append(display)
+        self.refresh()
 
-        for item in starred + regular:
-            self.todo_listbox.insert(tk.END, item)
+    PAGE_SIZE = 100 # rows added to the list at a time, as the user scrolls down
 
-class ProgressPage(tk.Frame):
+    @instrument.timed()
+    def refresh(self):
+        # shows the open assignments, priority first and then by due date; only the assignments
+        # that changed since the last refresh are moved in the to-do queue
+        changed = self.pending_changes()
+        if changed == []:
+            return
+        if changed is None:
+            self.todo = TodoQueue(self.controller.assignments)
+            self.limit = self.PAGE_SIZE
+        else:
+            for assignment_id in changed:
+                a = self.controller.assignments.get(assignment_id)
+                if a is None:
+                    self.todo.discard(assignment_id)
+                else:
+                    self.todo.update(a)
+        self.mark_synced()
+        self.show_rows()
+
+    def show_rows(self):
+        # puts the first `limit` to-do items in the listbox, rewriting only from the first row that differs
+        rows = [(a.id, f"{'★ ' if a.priority else ''}{a.title} - {a.class_name} - {a.due_date}")
+                for a in self.todo.top(self.limit)]
+        start = 0
+        while start < min(len(rows), len(self.shown)) and rows[start] == self.shown[start]:
+            start += 1
+        if start < len(self.shown):
+            self.todo_listbox.delete(start, tk.END)
+        if start < len(rows):
+            self.todo_listbox.insert(tk.END, *(text for _, text in rows[start:]))
+        self.shown = rows
+        self.count_label.config(text=f"{len(self.todo)} assignments to do")
+
+    def on_scroll(self, first, last):
+        # loads the next rows once the list is scrolled close to the bottom
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9 and len(self.shown) == self.limit and len(self.todo) > self.limit:
+            self.limit += self.PAGE_SIZE
+            self.after_idle(self.show_rows)
+
+class ProgressPage(AssignmentsView, tk.Frame):
     # Class that creates the ProgressPage and houses all of the function related to the page
     def __init__(self, parent, controller):
         super().__init__(parent, bg="white")
@@ -780,26 +1147,48 @@ class ProgressPage(tk.Frame):
         self.progress_bar = ttk.Progressbar(self, orient="horizontal", length=400, mode="determinate")
         self.progress_bar.pack(pady=10)
 
+        # Breakdown by class, type or due week
+        group_frame = tk.Frame(self, bg="white")
+        group_frame.pack(pady=(10, 0))
+        tk.Label(group_frame, text="Breakdown by:", bg="white").pack(side="left", padx=5)
+        self.grouping = tk.StringVar(value="class")
+        for grouping, text in (("class", "Class"), ("type", "Type"), ("week", "Week Due")):
+            tk.Radiobutton(group_frame, text=text, value=grouping, variable=self.grouping, bg="white",
+                           command=self.show_breakdown).pack(side="left")
+
+        self.breakdown_tree = ttk.Treeview(self, columns=("Group", "Completed", "Total", "Percent"), show="headings", height=10)
+        for column in ("Group", "Completed", "Total", "Percent"):
+            self.breakdown_tree.heading(column, text=column)
+            self.breakdown_tree.column(column, width=200 if column == "Group" else 90, anchor="w" if column == "Group" else "e")
+        self.breakdown_tree.pack(pady=10)
+
         self.refresh()
 
+    @instrument.timed()
     def refresh(self):
-        # updates the progress bar if needed upon reload
-        total = len(self.controller.assignments)
-        completed = sum(1 for a in self.controller.assignments if a.completed)
+        # updates the progress bar if needed upon reload; the counts are kept up to date by the
+        # assignment index itself, so nothing is recounted here
+        if self.pending_changes() == []:
+            return
+        self.mark_synced()
+        progress = self.controller.assignments.progress
 
-        if total == 0:
-            percent = 0
-        else:
-            percent = (completed / total) * 100
+        self.progress_label.config(text=f"Completed {progress.completed} out of {progress.total} assignments ({progress.percent():.1f}%)")
+        self.progress_bar["value"] = progress.percent()
+        self.show_breakdown()
 
-        self.progress_label.config(text=f"Completed {completed} out of {total} assignments ({percent:.1f}%)")
-        self.progress_bar["value"] = percent
+    def show_breakdown(self):
+        # fills the table with one row per class, type or week
+        self.breakdown_tree.delete(*self.breakdown_tree.get_children())
+        for label, total, completed, percent in self.controller.assignments.progress.breakdown(self.grouping.get()):
+            self.breakdown_tree.insert("", "end", values=(label, completed, total, f"{percent:.1f}%"))
 
 
 class SettingsPage(tk.Frame):
     # Class that creates the SettingsPage and houses all of the function related to the page
     def __init__(self, parent, controller):
         super().__init__(parent, bg="white")
+        self.controller = controller
         tk.Label(self, text="Settings Page", font=("Helvetica", 20), bg="white").pack(pady=20)
 
         # User Profile Section
@@ -827,50 +1216,119 @@ class SettingsPage(tk.Frame):
 
         tk.Button(self, text="Save Settings", command=self.save_settings).pack(pady=10) # creates the button used to save the settings
 
+        self.images = {} # thumbnail path -> PhotoImage, so a picture is only read from disk once
+
+    def refresh(self):
+        # fills in the current user's settings every time the page is shown
+        self.first_name_entry.delete(0, tk.END)
+        self.last_name_entry.delete(0, tk.END)
+        if hasattr(self, "profile_picture"):
+            del self.profile_picture
+        self.load_settings()
+
     def upload_image(self):
-        # allows the user to select a file on the computer as their profile page
+        # allows the user to select a file on the computer as their profile page; the thumbnail is
+        # made (or found in the cache) on a loader thread
         file_path = filedialog.askopenfilename()
         
         if not file_path:
             return
         
-        self.image_label.config(text=f"Selected: {os.path.basename(file_path)}")
-        self.profile_picture = file_path
-
-        img = Image.open(file_path)
-        img = img.resize((100,100))
-        img_tk = ImageTk.PhotoImage(img)
-
-        self.image_label.config(image=img_tk)
-        self.image_label.image = img_tk
+        self.image_label.config(image="", text=f"Loading {os.path.basename(file_path)}...")
+        self.load_thumbnail(file_path, lambda path: setattr(self, "profile_picture", path))
+
+    def load_thumbnail(self, source, on_done=None):
+        # shows the thumbnail of an image once it is ready
+        def show(path):
+            if on_done is not None:
+                on_done(path)
+            self.show_picture(path)
+
+        def failed(error):
+            self.image_label.config(image="", text=f"Could not open {os.path.basename(source)}")
+        self.controller.run_in_background(lambda: thumbnails.make_thumbnail(source), show, failed)
+
+    def show_picture(self, path):
+        # shows a cached thumbnail; Tk reads the png itself, so Pillow isn't needed here
+        image = self.images.get(path)
+        if image is None:
+            image = self.images[path] = tk.PhotoImage(file=path)
+        self.image_label.config(image=image, text="")
 
     def save_settings(self):
-        # saves the settings preferences to the settings.json file
-        settings = {
+        # saves the settings preferences for the current user to the settings file
+        username = self.controller.current_user["username"]
+        fields = {
             "first_name": self.first_name_entry.get(),
             "last_name": self.last_name_entry.get(),
-            "profile_picture": getattr(self, "profile_picture", ""),
             "default_view": self.default_view.get()
         }
-
-        with open("user_settings.json", "w") as file:
-            json.dump(settings, file)
+        if hasattr(self, "profile_picture"):
+            fields["profile_picture"] = self.profile_picture
+        tracker.update_settings(username, **fields)
         
         messagebox.showinfo("Success", "Settings have been saved succesfully.")
 
     def load_settings(self):
         # preloads the setttings for each user when they login
-        if os.path.exists("user_settings.json"):
-            with open("user_settings.json", "r") as file:
-                settings = json.load(file)
-                self.first_name_entry.insert(0, settings.get("first_name", ""))
-                self.last_name_entry.insert(0, settings.get("last_name", ""))
-                self.default_view.set(settings.get("default_view", "Home"))
-
-                if settings.get("profile_picture"):
-                    self.image_label.config(text=f"Selected: {os.path.basename(settings['profile_picture'])}")
+        settings = tracker.settings(self.controller.current_user["username"])
+        self.first_name_entry.insert(0, settings.get("first_name", ""))
+        self.last_name_entry.insert(0, settings.get("last_name", ""))
+        self.default_view.set(settings.get("default_view", "Home"))
+
+        picture = settings.get("profile_picture")
+        if not picture:
+            self.image_label.config(image="", text="")
+        elif thumbnails.is_thumbnail(picture) and os.path.exists(picture):
+            self.show_picture(picture)
+        elif os.path.exists(picture):
+            # saved before thumbnails were cached: make one now and point the settings at it
+            username = self.controller.current_user["username"]
+            self.image_label.config(image="", text=f"Loading {os.path.basename(picture)}...")
+            self.load_thumbnail(picture, lambda path: tracker.update_settings(username, profile_picture=path))
+        else:
+            self.image_label.config(image="", text=f"Missing: {os.path.basename(picture)}")
     
 
+class DiagnosticsPage(tk.Frame):
+    # Hidden page (Ctrl+Shift+D with --profile or TRACKER_PROFILE=1) that shows the recorded timings
+    def __init__(self, parent, controller):
+        super().__init__(parent, bg="white")
+        self.controller = controller
+
+        top_frame = tk.Frame(self, bg="white")
+        top_frame.pack(fill="x", pady=(20, 0))
+        tk.Label(top_frame, text="Diagnostics", font=("Helvetica", 20), bg="white").pack(side="left", padx=20)
+        tk.Button(top_frame, text="Dump to File", command=self.dump).pack(side="right", padx=10)
+        tk.Button(top_frame, text="Reset", command=self.reset).pack(side="right", padx=10)
+        tk.Button(top_frame, text="Refresh", command=self.refresh).pack(side="right", padx=10)
+
+        columns = ("Name", "Calls", "Total ms", "p50 ms", "p95 ms", "p99 ms", "Read", "Written")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        for column in columns:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=260 if column == "Name" else 70, anchor="w" if column == "Name" else "e")
+        self.tree.pack(fill="both", expand=True, pady=10)
+
+    def refresh(self):
+        # shows the current numbers, slowest total first
+        self.tree.delete(*self.tree.get_children())
+        stats = sorted(instrument.snapshot().items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for name, stat in stats:
+            self.tree.insert("", "end", values=(
+                name, stat["count"], f"{stat['total_ms']:.1f}", f"{stat['p50_ms']:.2f}",
+                f"{stat['p95_ms']:.2f}", f"{stat['p99_ms']:.2f}", stat["bytes_read"], stat["bytes_written"]
+            ))
+
+    def dump(self):
+        instrument.dump()
+        messagebox.showinfo("Saved", f"Timings written to {instrument.DUMP_FILE}")
+
+    def reset(self):
+        instrument.reset()
+        self.refresh()
+
+
 if __name__ == "__main__":
     app = AssignmentTrackerApp()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,82 @@
+# Saving through the cached backend when the disk write fails. Run with: python -m unittest
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from tracker import core, journal
+
+real_append = journal.Journal.append
+
+
+def failing_append(times):
+    # a Journal.append that raises "disk full" the first `times` calls
+    calls = []
+
+    def append(self, changes):
+        calls.append(changes)
+        if len(calls) <= times:
+            raise OSError("disk full")
+        return real_append(self, changes)
+    return append
+
+
+class FailedSaveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        tracker = core.Tracker(core.open_backend(self.directory.name))
+        tracker.sign_up("Ada", "Lovelace", "ada", "pw")
+        tracker.close()
+
+    def titles(self):
+        tracker = core.Tracker(core.open_backend(self.directory.name))
+        try:
+            return sorted(a.title for a in tracker.assignments("ada"))
+        finally:
+            tracker.close()
+
+    def test_flush_writes_what_a_failed_flush_left(self):
+        tracker = core.Tracker(core.open_backend(self.directory.name, write_behind=True))
+        with mock.patch.object(journal.Journal, "append", failing_append(1)):
+            tracker.add_assignment("ada", "Essay", "2025-03-01", "English", "Essay")
+            tracker.backend.flush()
+            self.assertIsInstance(tracker.backend.writer.errors.get_nowait(), OSError)
+            tracker.close()
+        self.assertEqual(self.titles(), ["Essay"])
+
+    def test_flush_and_close_raise_while_the_disk_keeps_failing(self):
+        tracker = core.Tracker(core.open_backend(self.directory.name, write_behind=True))
+        with mock.patch.object(journal.Journal, "append", failing_append(1000)):
+            tracker.add_assignment("ada", "Essay", "2025-03-01", "English", "Essay")
+            with self.assertRaises(OSError):
+                tracker.backend.flush()
+            with self.assertRaises(OSError):
+                tracker.close()
+        self.assertEqual(self.titles(), [])
+
+    def test_writer_retries_on_its_own(self):
+        tracker = core.Tracker(core.open_backend(self.directory.name, write_behind=True))
+        tracker.backend.writer.delay = tracker.backend.writer.retry_delay = 0.01
+        with mock.patch.object(journal.Journal, "append", failing_append(2)):
+            tracker.add_assignment("ada", "Essay", "2025-03-01", "English", "Essay")
+            for _ in range(200):
+                if tracker.backend.writer.errors.qsize() == 2 and not tracker.backend._has_unsaved():
+                    break
+                time.sleep(0.01)
+            self.assertFalse(tracker.backend._has_unsaved())
+        tracker.close()
+        self.assertEqual(self.titles(), ["Essay"])
+
+    def test_write_through_keeps_the_change_for_the_next_flush(self):
+        tracker = core.Tracker(core.open_backend(self.directory.name))
+        with mock.patch.object(journal.Journal, "append", failing_append(1)):
+            with self.assertRaises(OSError):
+                tracker.add_assignment("ada", "Essay", "2025-03-01", "English", "Essay")
+            tracker.backend.flush()
+        tracker.close()
+        self.assertEqual(self.titles(), ["Essay"])
+
+
+if __name__ == "__main__":
+    unittest.main()
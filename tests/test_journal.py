@@ -0,0 +1,173 @@
+# Checks the assignments journal: replaying it over the snapshot, cutting off a line torn by a
+# crash, compaction, and the version checks of the json backend across writes.
+# Run with: python -m unittest
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tracker import storage
+from tracker.journal import Journal
+from tracker.storage import Change, ConflictError, JsonBackend
+
+
+def record(title, version=None):
+    data = {"title": title, "due_date": "2025-03-01", "class_name": "English", "assignment_type": "Essay",
+            "completed": False, "priority": False}
+    if version is not None:
+        data["version"] = version
+    return data
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.journal = Journal(os.path.join(self.directory.name, "assignments.journal"))
+
+    def test_entries_in_order_and_by_user(self):
+        self.journal.append([Change("assignments", "ada", "a1", record("Essay")),
+                             Change("assignments", "bob", "b1", record("Lab"))])
+        self.journal.append([Change("assignments", "ada", "a1", None),
+                             Change("assignments", "ada", None, {"a2": record("Quiz")})])
+        self.assertEqual(list(self.journal.entries()), [
+            ("ada", "a1", record("Essay")), ("bob", "b1", record("Lab")),
+            ("ada", "a1", None), ("ada", None, {"a2": record("Quiz")}),
+        ])
+        self.assertEqual([key for _, key, _ in self.journal.entries("bob")], ["b1"])
+        self.assertEqual([key for _, key, _ in self.journal.entries("nobody")], [])
+
+    def test_user_marker_matches_unicode_and_quotes(self):
+        self.journal.append([Change("assignments", 'zoë "z"', "k", record("Ünïcode"))])
+        self.assertEqual(list(self.journal.entries('zoë "z"')), [('zoë "z"', "k", record("Ünïcode"))])
+
+    def test_append_returns_the_bytes_written(self):
+        written = self.journal.append([Change("assignments", "ada", "a1", record("Essay"))])
+        self.assertEqual(written, self.journal.size())
+
+    def test_torn_last_line_is_skipped_and_cut_off(self):
+        self.journal.append([Change("assignments", "ada", "a1", record("Essay"))])
+        with open(self.journal.path, "ab") as f:
+            f.write(b'{"ts":1,"op":"put","user":"ada","id":"a2","rec')  # a crash during an append
+        self.assertEqual([key for _, key, _ in self.journal.entries()], ["a1"])
+
+        self.journal.append([Change("assignments", "ada", "a3", record("Quiz"))])
+        self.assertEqual([key for _, key, _ in self.journal.entries()], ["a1", "a3"])
+        with open(self.journal.path, "rb") as f:
+            lines = f.read().split(b"\n")
+        self.assertEqual(lines[-1], b"")
+        self.assertTrue(all(json.loads(line) for line in lines[:-1]))
+
+    def test_torn_only_line(self):
+        with open(self.journal.path, "wb") as f:
+            f.write(b'{"ts":1,"op":"pu')
+        self.assertEqual(list(self.journal.entries()), [])
+        self.journal.append([Change("assignments", "ada", "a1", record("Essay"))])
+        self.assertEqual([key for _, key, _ in self.journal.entries()], ["a1"])
+
+    def test_corrupt_line_raises(self):
+        self.journal.append([Change("assignments", "ada", "a1", record("Essay"))])
+        with open(self.journal.path, "ab") as f:
+            f.write(b"not json\n")
+        with self.assertRaises(ValueError):
+            list(self.journal.entries())
+
+    def test_unknown_op_raises(self):
+        with open(self.journal.path, "wb") as f:
+            f.write(b'{"ts":1,"op":"merge","user":"ada","id":"a1","record":null}\n')
+        with self.assertRaises(ValueError):
+            list(self.journal.entries())
+
+
+class JsonBackendJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.backend = self.open()
+
+    def open(self):
+        path = self.directory.name
+        return JsonBackend(os.path.join(path, "users.json"), os.path.join(path, "users_settings.json"),
+                           os.path.join(path, "assignments.json"))
+
+    def test_replay_over_the_snapshot(self):
+        self.backend.save_assignments({"ada": {"assignments": {"a1": record("Essay", 1), "a2": record("Lab", 1)}}})
+        self.backend.apply([
+            Change("assignments", "ada", "a1", record("Essay 2"), 1),
+            Change("assignments", "ada", "a2", None),
+            Change("assignments", "bob", "b1", record("Quiz"), 0),
+        ])
+        expected_ada = {"a1": record("Essay 2", 2)}
+        for backend in (self.backend, self.open()):
+            self.assertEqual(backend.load_user_assignments("ada"), expected_ada)
+            self.assertEqual(backend.load_assignments(), {"ada": {"assignments": expected_ada},
+                                                          "bob": {"assignments": {"b1": record("Quiz", 1)}}})
+
+    def test_replace_and_delete_user_replay(self):
+        self.backend.apply([Change("assignments", "ada", "a1", record("Essay"), 0)])
+        self.backend.apply([Change("assignments", "ada", None, {"a9": record("New", 1)})])
+        self.assertEqual(self.open().load_user_assignments("ada"), {"a9": record("New", 1)})
+        self.backend.apply([Change("assignments", "ada", None, None)])
+        self.assertEqual(self.open().load_user_assignments("ada"), {})
+        self.assertNotIn("ada", self.open().load_assignments())
+
+    def test_compaction_folds_the_journal_into_the_snapshot(self):
+        self.backend.apply([Change("assignments", "ada", f"a{n}", record(f"Essay {n}"), 0) for n in range(20)])
+        before = self.backend.load_assignments()
+        self.assertGreater(self.backend.journal.size(), 0)
+
+        with mock.patch.object(storage, "COMPACT_MIN_BYTES", 1), mock.patch.object(storage, "COMPACT_RATIO", 0):
+            self.backend.apply([Change("assignments", "ada", "a0", record("Essay 0 again"), 1)])
+        self.assertEqual(self.backend.journal.size(), 0)
+        before["ada"]["assignments"]["a0"] = record("Essay 0 again", 2)
+        with open(self.backend.assignments_file, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), before)
+
+        # appends after a compaction replay over the new snapshot
+        self.backend.apply([Change("assignments", "ada", "a1", None)])
+        del before["ada"]["assignments"]["a1"]
+        self.assertEqual(self.open().load_assignments(), before)
+        self.assertEqual(self.open().load_user_assignments("ada"), before["ada"]["assignments"])
+
+    def test_no_compaction_below_the_thresholds(self):
+        self.backend.save_assignments({"ada": {"assignments": {f"a{n}": record("x" * 100, 1) for n in range(50)}}})
+        self.backend.apply([Change("assignments", "ada", "a0", record("small"), 1)])
+        self.assertGreater(self.backend.journal.size(), 0)
+        # the journal is past the minimum size but still under COMPACT_RATIO of the snapshot
+        with mock.patch.object(storage, "COMPACT_MIN_BYTES", 1):
+            self.backend.apply([Change("assignments", "ada", "a1", record("small"), 1)])
+        self.assertGreater(self.backend.journal.size(), 0)
+
+    def test_versions_are_checked_across_writes(self):
+        self.backend.apply([Change("assignments", "ada", "a1", record("Essay"), 0)])
+        self.backend.apply([Change("assignments", "ada", "a1", record("Essay 2"), 1)])
+        with self.assertRaises(ConflictError) as caught:
+            self.backend.apply([Change("assignments", "ada", "a1", record("stale"), 1)])
+        self.assertEqual([c.key for c in caught.exception.conflicts], ["a1"])
+        with self.assertRaises(ConflictError):
+            self.backend.apply([Change("assignments", "ada", "a1", record("again"), 0)])  # already exists
+        self.assertEqual(self.backend.load_user_assignments("ada"), {"a1": record("Essay 2", 2)})
+
+    def test_versions_are_checked_against_other_writers(self):
+        # a second backend (another window or process) writes in between; the first one's
+        # remembered records are out of date and must not let its stale change through
+        other = self.open()
+        self.backend.apply([Change("assignments", "ada", "a1", record("Essay"), 0)])
+        other.apply([Change("assignments", "ada", "a1", record("Other"), 1)])
+        with self.assertRaises(ConflictError):
+            self.backend.apply([Change("assignments", "ada", "a1", record("Mine"), 1)])
+        self.backend.apply([Change("assignments", "ada", "a1", record("Mine"), 2)])
+        self.assertEqual(other.load_user_assignments("ada"), {"a1": record("Mine", 3)})
+
+    def test_conflicts_do_not_stop_the_rest_of_the_batch(self):
+        self.backend.apply([Change("assignments", "ada", "a1", record("Essay"), 0)])
+        with self.assertRaises(ConflictError) as caught:
+            self.backend.apply([Change("assignments", "ada", "a1", record("stale"), 5),
+                                Change("assignments", "ada", "a2", record("Lab"), 0)])
+        self.assertEqual(len(caught.exception.conflicts), 1)
+        self.assertEqual(sorted(self.open().load_user_assignments("ada")), ["a1", "a2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+# Checks the streaming reader against json.load. Run with: python -m unittest
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tracker import jsonstream
+
+DOCUMENTS = [
+    "{}",
+    " \n{ }\n",
+    '{"alice": {"a1": {"title": "Essay", "completed": false}}}',
+    '{"a": 1, "b": -2.5e3, "c": null, "d": true, "e": [], "f": {}, "g": ""}',
+    '{"ünïcødé": {"title": "日本語のレポート 📚"}, "b": "\\u00e9\\ud83d\\ude00"}',
+    '{"quo\\"te": 1, "back\\\\slash": 2, "new\\nline": 3, "\\u0041": 4}',
+    '{"x": 12345678901234567890, "y": 0.000125}',
+    '{"nested": {"deep": [1, [2, [3, {"k": "}"}]]], "s": "{\\"not\\": \\"a key\\"}"}}',
+]
+
+MALFORMED = [
+    "",
+    '{"a": 1',
+    '{"a": 1 "b": 2}',
+    '{"a": 1,}',
+    '{"a" 1}',
+    '{a: 1}',
+    '{"a": tru}',
+    '{"a": "unterminated}',
+    '{"a": 12',
+]
+
+
+class JsonStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, text):
+        path = os.path.join(self.directory.name, "data.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def stream(self, chunk_size):
+        # a tiny CHUNK_SIZE makes every value cross at least one buffer boundary, and
+        # STREAMING_THRESHOLD 0 makes load_section stream even the smallest file
+        return mock.patch.multiple(jsonstream, CHUNK_SIZE=chunk_size, STREAMING_THRESHOLD=0)
+
+    def test_iter_items_matches_json_load(self):
+        for text in DOCUMENTS:
+            path = self.write(text)
+            expected = list(json.loads(text).items())
+            for chunk_size in (1, 2, 3, 7, 1 << 20):
+                with self.subTest(text=text, chunk_size=chunk_size), self.stream(chunk_size):
+                    self.assertEqual(list(jsonstream.iter_items(path)), expected)
+
+    def test_load_section_matches_json_load(self):
+        for text in DOCUMENTS:
+            path = self.write(text)
+            document = json.loads(text)
+            for chunk_size in (1, 5, 1 << 20):
+                for key in list(document) + ["missing"]:
+                    with self.subTest(text=text, chunk_size=chunk_size, key=key), self.stream(chunk_size):
+                        self.assertEqual(jsonstream.load_section(path, key, "default"),
+                                         document.get(key, "default"))
+
+    def test_iter_items_keeps_duplicate_keys(self):
+        # json.load keeps the last one; iter_items yields both and load_section returns the first
+        path = self.write('{"dup": 1, "other": 2, "dup": 3}')
+        with self.stream(1):
+            self.assertEqual(list(jsonstream.iter_items(path)), [("dup", 1), ("other", 2), ("dup", 3)])
+            self.assertEqual(jsonstream.load_section(path, "dup"), 1)
+
+    def test_load_section_small_file_uses_json_load(self):
+        path = self.write('{"alice": {"theme": "dark"}}')
+        self.assertEqual(jsonstream.load_section(path, "alice"), {"theme": "dark"})
+        self.assertIsNone(jsonstream.load_section(path, "bob"))
+
+    def test_load_section_stops_at_the_key(self):
+        # the entries after the one asked for are never read, so a broken tail is not noticed
+        path = self.write('{"a": 1, "b": {"x": 2}, "c": broken')
+        with self.stream(1):
+            self.assertEqual(jsonstream.load_section(path, "b"), {"x": 2})
+
+    def test_malformed_input_raises(self):
+        for text in MALFORMED:
+            path = self.write(text)
+            with self.assertRaises(json.JSONDecodeError):
+                json.loads(text)
+            for chunk_size in (1, 4, 1 << 20):
+                with self.subTest(text=text, chunk_size=chunk_size), self.stream(chunk_size):
+                    with self.assertRaises(json.JSONDecodeError):
+                        list(jsonstream.iter_items(path))
+                    with self.assertRaises(json.JSONDecodeError):
+                        jsonstream.load_section(path, "missing")
+
+    def test_top_level_must_be_an_object(self):
+        path = self.write("[1, 2]")
+        with self.stream(1), self.assertRaises(json.JSONDecodeError):
+            list(jsonstream.iter_items(path))
+
+    def test_number_ending_at_the_buffer_edge(self):
+        # at some chunk size every number is cut off by the end of a chunk: "12" of 12345 and
+        # "-2.5e" of -2.5e+3 decode (or nearly do) on their own but go on in the next chunk
+        text = '{"n":12345, "m": 6, "f": -2.5e+3, "g": 0.125}'
+        path = self.write(text)
+        for chunk_size in range(1, len(text) + 1):
+            with self.subTest(chunk_size=chunk_size), self.stream(chunk_size):
+                self.assertEqual(dict(jsonstream.iter_items(path)), {"n": 12345, "m": 6, "f": -2500.0, "g": 0.125})
+
+    def test_read_value_retries_until_the_value_is_complete(self):
+        path = self.write('"a long string value", 42}')
+        with self.stream(3), open(path, encoding="utf-8") as f:
+            reader = jsonstream._Reader(f)
+            self.assertEqual(reader.read_value(), "a long string value")
+            reader.expect(",")
+            self.assertEqual(reader.read_value(), 42)
+            self.assertEqual(reader.peek(), "}")
+
+    def test_read_value_at_end_of_file(self):
+        # a number at the very end of the file is only complete once fill() finds nothing more
+        path = self.write("  987")
+        with self.stream(2), open(path, encoding="utf-8") as f:
+            reader = jsonstream._Reader(f)
+            self.assertEqual(reader.read_value(), 987)
+            self.assertEqual(reader.peek(), "")
+
+    def test_read_value_keeps_the_buffer_small(self):
+        # fill() drops the text already read, so the buffer never holds much more than one value
+        entries = {f"user{n}": {"title": "x" * 50} for n in range(200)}
+        path = self.write(json.dumps(entries))
+        with self.stream(64), open(path, encoding="utf-8") as f:
+            reader = jsonstream._Reader(f)
+            reader.expect("{")
+            largest = 0
+            while reader.peek() == '"':
+                reader.read_value()
+                reader.expect(":")
+                reader.read_value()
+                largest = max(largest, len(reader.buf))
+                if reader.peek() == ",":
+                    reader.pos += 1
+            self.assertLess(largest, 4 * 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
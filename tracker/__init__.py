@@ -0,0 +1 @@
+# Data layer for the Assignment Tracker (storage engines and helpers used by main.py)
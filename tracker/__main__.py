@@ -0,0 +1,195 @@
+# Command line access to the tracker data, for scripts and batch jobs that shouldn't start the window.
+#
+#   python -m tracker list alice --pending
+#   python -m tracker add alice "Essay 2" 2025-03-01 "English" Essay --priority
+#   python -m tracker complete alice 3f2a... 9b1c...
+#   python -m tracker delete alice 3f2a...
+#   python -m tracker import alice syllabus.csv --class English
+#   python -m tracker progress alice --by week
+#   python -m tracker users
+#   python -m tracker add-user bob --first-name Bob --last-name Smith --password secret
+#   python -m tracker delete-user bob
+#
+# --data-dir, --backend and --format pick the data the same way TRACKER_BACKEND/TRACKER_FORMAT do for the app.
+import argparse
+import json
+import sys
+from datetime import date
+
+from tracker import core, formats, progress, storage
+
+
+def parse_date(text):
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a date (expected YYYY-MM-DD)")
+
+
+def list_assignments(tracker, args):
+    completed = True if args.completed else False if args.pending else None
+    assignments = core.filter_assignments(tracker.assignments(args.username), args.class_name, completed,
+                                          args.due_from, args.due_to, args.type, True if args.priority else None)
+    if args.json:
+        json.dump([a.to_dict() for a in assignments], sys.stdout, indent=4)
+        print()
+        return
+    for a in assignments:
+        print("\t".join((a.id, a.due_date, "x" if a.completed else " ", "*" if a.priority else " ",
+                         a.class_name, a.assignment_type, a.title)))
+
+
+def add_assignment(tracker, args):
+    require_user(tracker, args.username)
+    a = tracker.add_assignment(args.username, args.title, args.due_date, args.class_name, args.type,
+                               completed=args.completed, priority=args.priority)
+    print(a.id)
+
+
+def import_file(tracker, args):
+    added, errors = tracker.import_file(args.username, args.file, args.class_name, args.type)
+    for line, error in errors:
+        print(f"{args.file}:{line}: {error}", file=sys.stderr)
+    print(f"imported {len(added)} assignments, skipped {len(errors)} rows")
+    if errors:
+        sys.exit(1)
+
+
+def complete_assignments(tracker, args):
+    tracker.set_completed(args.username, args.ids, completed=not args.undo)
+
+
+def delete_assignments(tracker, args):
+    require_user(tracker, args.username)
+    # like complete, nothing is deleted when one of the ids is unknown
+    current = tracker.backend.load_user_assignments(args.username)
+    for assignment_id in args.ids:
+        if assignment_id not in current:
+            raise core.TrackerError(f"No assignment with id '{assignment_id}'.")
+    tracker.delete_assignments(args.username, args.ids)
+
+
+def show_progress(tracker, args):
+    require_user(tracker, args.username)
+    counts = tracker.progress(args.username)
+    if args.json:
+        json.dump(counts.to_dict(), sys.stdout, indent=4)
+        print()
+        return
+    print(f"completed {counts.completed} of {counts.total} ({counts.percent():.1f}%)")
+    for label, total, completed, percent in counts.breakdown(args.by):
+        print(f"{label}\t{completed}/{total}\t{percent:.1f}%")
+
+
+def list_users(tracker, args):
+    for username, user in tracker.users().items():
+        print("\t".join((username, user.get("role", ""), f"{user.get('first_name', '')} {user.get('last_name', '')}")))
+
+
+def add_user(tracker, args):
+    tracker.sign_up(args.first_name, args.last_name, args.new_username, args.password, role=args.role)
+
+
+def delete_user(tracker, args):
+    tracker.delete_user(args.username)
+
+
+def reset_password(tracker, args):
+    tracker.reset_password(args.username, args.password)
+
+
+def require_user(tracker, username):
+    if tracker.user(username) is None:
+        raise core.TrackerError(f"User '{username}' does not exist.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m tracker", description="Manage assignment tracker data without the window.")
+    parser.add_argument("--data-dir", default=".", help="folder with the data files (default: current folder)")
+    parser.add_argument("--backend", choices=storage.BACKENDS, help="storage backend (default: $TRACKER_BACKEND or json)")
+    parser.add_argument("--format", choices=formats.FORMATS, help="file format written (default: $TRACKER_FORMAT or json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("list", help="list a user's assignments (id, due date, done, priority, class, type, title)")
+    command.add_argument("username")
+    command.add_argument("--class", dest="class_name")
+    command.add_argument("--type")
+    command.add_argument("--priority", action="store_true", help="only priority assignments")
+    done = command.add_mutually_exclusive_group()
+    done.add_argument("--pending", action="store_true", help="only assignments that aren't completed")
+    done.add_argument("--completed", action="store_true", help="only completed assignments")
+    command.add_argument("--from", dest="due_from", type=parse_date, help="due on or after this date")
+    command.add_argument("--to", dest="due_to", type=parse_date, help="due on or before this date")
+    command.add_argument("--json", action="store_true", help="print the records as json")
+    command.set_defaults(run=list_assignments)
+
+    command = commands.add_parser("add", help="add an assignment and print its id")
+    command.add_argument("username")
+    command.add_argument("title")
+    command.add_argument("due_date", help="YYYY-MM-DD")
+    command.add_argument("class_name")
+    command.add_argument("type")
+    command.add_argument("--priority", action="store_true")
+    command.add_argument("--completed", action="store_true")
+    command.set_defaults(run=add_assignment)
+
+    command = commands.add_parser("import", help="add the assignments of a .csv or .ics file in one write")
+    command.add_argument("username")
+    command.add_argument("file")
+    command.add_argument("--class", dest="class_name", help="class for the rows that don't name one")
+    command.add_argument("--type", help="type for the rows that don't name one")
+    command.set_defaults(run=import_file)
+
+    command = commands.add_parser("complete", help="mark assignments as completed")
+    command.add_argument("username")
+    command.add_argument("ids", nargs="+")
+    command.add_argument("--undo", action="store_true", help="mark them as not completed instead")
+    command.set_defaults(run=complete_assignments)
+
+    command = commands.add_parser("delete", help="delete assignments")
+    command.add_argument("username")
+    command.add_argument("ids", nargs="+")
+    command.set_defaults(run=delete_assignments)
+
+    command = commands.add_parser("progress", help="show how many of a user's assignments are completed")
+    command.add_argument("username")
+    command.add_argument("--by", default="class", choices=progress.GROUPINGS, help="breakdown to show (default: class)")
+    command.add_argument("--json", action="store_true", help="print every breakdown as json")
+    command.set_defaults(run=show_progress)
+
+    command = commands.add_parser("users", help="list the accounts")
+    command.set_defaults(run=list_users)
+
+    command = commands.add_parser("add-user", help="create an account")
+    command.add_argument("new_username")
+    command.add_argument("--first-name", required=True)
+    command.add_argument("--last-name", required=True)
+    command.add_argument("--password", required=True)
+    command.add_argument("--role", default="student", choices=core.ROLES)
+    command.set_defaults(run=add_user)
+
+    command = commands.add_parser("delete-user", help="delete an account with its assignments and settings")
+    command.add_argument("username")
+    command.set_defaults(run=delete_user)
+
+    command = commands.add_parser("reset-password", help="set a new password for an account")
+    command.add_argument("username")
+    command.add_argument("password")
+    command.set_defaults(run=reset_password)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    tracker = core.Tracker(core.open_backend(args.data_dir, args.backend, args.format))
+    try:
+        args.run(tracker, args)
+    except (core.TrackerError, storage.ConflictError) as e:
+        parser.exit(1, f"error: {e}\n")
+    finally:
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import threading
+
+from tracker import instrument
+from tracker.storage import (ConflictError, StorageBackend, apply_change, apply_user_assignment_change,
+                             version_matches)
+from tracker.writer import SaveQueue
+
+
+class CachedBackend(StorageBackend):
+    # Wraps a storage backend and keeps the parsed users, settings and assignments in memory.
+    # A cached copy is only reloaded when the backend reports that the data behind it changed
+    # (for the json files: their modification time or size).
+    #
+    # Without write_behind every change is written through to the wrapped backend straight
+    # away. With write_behind the change is applied in memory and a SaveQueue writes it from a
+    # background thread, coalescing everything that changed since its last flush; apply(wait=True)
+    # writes on the caller's thread instead, for changes whose conflicts the caller must see
+    # (a new account, a new password).
+    #
+    # Writes never overlap: an apply that writes on its own thread (without write_behind, or with
+    # wait) waits for the write in progress and then writes everything queued in the meantime, so
+    # applies from many threads at once go out in a few batches. A write hands the conflicts of
+    # changes another apply is waiting for back to that apply, which raises them.
+    #
+    # For whole-file backends a collection that is cached as a whole is saved straight from the
+    # memory copy, as long as nobody else (another window, the command line) wrote the file since
+    # it was read; that is checked under the backend's file lock. Otherwise, and for a user's
+    # assignments cached on their own (read with the streaming loader), and always for journaled
+    # assignments, the changes are handed to backend.apply, which checks them against the current
+    # records. Entries that someone else changed are dropped, so the next load sees their changes.
+    def __init__(self, backend, write_behind=False):
+        self.backend = backend
+        self.rewrites_whole_file = backend.rewrites_whole_file
+        self.journaled = backend.journaled
+        self.lock = threading.RLock()
+        self._entries = {}  # (collection, username or None) -> (signature, data)
+        self._dirty = set()  # collections changed in memory that the writer has not picked up yet
+        self._writing = set()  # collections the writer is saving right now
+        self._full_saves = set()  # collections to save as a whole from their cached copy
+        self._replaced = set()  # of those, the ones replaced with save_*, saved even if the file changed
+        self._pending = []  # changes waiting for the writer
+        self._inflight = []  # changes the writer is saving right now
+        self._write_lock = threading.Lock()  # one _write_pending at a time
+        self._waiting = set()  # ids of the changes whose apply waits until they are written
+        self._conflicted = {}  # of those, the ones a write rejected: id -> change, for their apply to raise
+        self.writer = SaveQueue(self._write_pending) if write_behind else None
+
+    def _unsaved(self, collection):
+        return collection in self._dirty or collection in self._writing
+
+    def _cached(self, key):
+        # returns the cached data for key, or None if it is missing or out of date
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._unsaved(key[0]):
+            # our own changes have not reached the disk yet, so the memory copy is the newest
+            return entry[1]
+        if entry[0] == self.backend.signature(*key):
+            return entry[1]
+        return None
+
+    def _load(self, key, loader):
+        with self.lock:
+            data = self._cached(key)
+            if data is None:
+                signature = self.backend.signature(*key)
+                data = loader()
+                self._entries[key] = (signature, data)
+                if self._unsaved(key[0]):
+                    # the backend does not have our queued changes yet, so lay them on top
+                    self._apply_in_memory([c for c in self._inflight + self._pending if c.collection == key[0]],
+                                          only=key)
+            return data
+
+    def _store(self, key, data):
+        self._entries[key] = (self.backend.signature(*key), data)
+
+    def signature(self, collection, username=None):
+        return self.backend.signature(collection, username)
+
+    @instrument.timed()
+    def load_users(self):
+        return self._load(("users", None), self.backend.load_users)
+
+    @instrument.timed()
+    def load_settings(self):
+        return self._load(("settings", None), self.backend.load_settings)
+
+    @instrument.timed()
+    def load_assignments(self):
+        return self._load(("assignments", None), self.backend.load_assignments)
+
+    @instrument.timed()
+    def load_user_assignments(self, username):
+        with self.lock:
+            if self.rewrites_whole_file:
+                # serve from the whole copy when it is already in memory
+                assignments = self._cached(("assignments", None))
+                if assignments is not None:
+                    return assignments.get(username, {}).get("assignments", {})
+            return self._load(("assignments", username), lambda: self.backend.load_user_assignments(username))
+
+    def save_users(self, users):
+        self._save_collection("users", users)
+
+    def save_settings(self, settings):
+        self._save_collection("settings", settings)
+
+    def save_assignments(self, assignments):
+        self._save_collection("assignments", assignments)
+
+    def _save_collection(self, collection, data):
+        # replaces a whole collection; whole-file backends hand it to the writer like any other change
+        with self.lock:
+            self._drop(collection)
+            if self.writer is not None and self.rewrites_whole_file:
+                self._entries[(collection, None)] = (None, data)
+                self._full_saves.add(collection)
+                self._replaced.add(collection)
+                self._dirty.add(collection)
+                self.writer.request()
+                return
+        self.flush()
+        with self.lock, self.backend.locked():
+            self.backend.save_collection(collection, data)
+            self._store((collection, None), data)
+
+    @instrument.timed()
+    def apply(self, changes, wait=False):
+        with self.lock:
+            touched = {change.collection for change in changes}
+            for key in list(self._entries):
+                if key[0] in touched and self._cached(key) is None:
+                    del self._entries[key]
+
+            full = set()
+            if self.rewrites_whole_file:
+                # users and settings are small and always kept whole; the assignments are saved
+                # from memory only when they are already cached as a whole (and not journaled)
+                for collection in touched:
+                    if collection != "assignments" and (collection, None) not in self._entries:
+                        self.load_collection(collection)
+                full = {collection for collection in touched if (collection, None) in self._entries
+                        and not (collection == "assignments" and self.backend.journaled)}
+            conflicts = self._outdated(changes)
+            if conflicts:
+                changes = [change for change in changes if change not in conflicts]
+            self._apply_in_memory(changes)
+            self._full_saves.update(full)
+            self._pending.extend(changes)
+            self._dirty.update(touched)
+            if self.writer is not None and not wait:
+                if conflicts:
+                    self.writer.errors.put(ConflictError(conflicts))
+                self.writer.request()
+                return
+            mine = {id(change) for change in changes}
+            self._waiting.update(mine)
+        unclaimed = []
+        try:
+            self._write_pending()
+        except ConflictError as e:
+            unclaimed = e.conflicts
+        finally:
+            with self.lock:
+                self._waiting.difference_update(mine)
+                conflicts = conflicts + [self._conflicted.pop(i) for i in mine if i in self._conflicted]
+        if unclaimed:
+            if self.writer is not None:
+                # changes queued by earlier applies without wait: reported like any other writer error
+                self.writer.errors.put(ConflictError(unclaimed))
+            else:
+                conflicts = conflicts + unclaimed
+        if conflicts:
+            raise ConflictError(conflicts)
+
+    def _outdated(self, changes):
+        # the changes made from an older version of a record than the cached one; the rest are
+        # checked again by the backend when they are written
+        conflicts = []
+        for change in changes:
+            if change.version is None:
+                continue
+            whole = self._entries.get((change.collection, None))
+            if change.collection != "assignments":
+                if whole is None:
+                    continue
+                current = whole[1].get(change.username)
+            elif whole is not None:
+                current = whole[1].get(change.username, {}).get("assignments", {}).get(change.key)
+            elif ("assignments", change.username) in self._entries:
+                current = self._entries[("assignments", change.username)][1].get(change.key)
+            else:
+                continue
+            if not version_matches(current, change):
+                conflicts.append(change)
+        return conflicts
+
+    def _apply_in_memory(self, changes, only=None):
+        # applies changes to the cached entries they touch (or just to the entry `only`)
+        for change in changes:
+            key = (change.collection, None)
+            entry = self._entries.get(key)
+            if entry is not None and only in (None, key):
+                apply_change(entry[1], change)
+            if change.collection == "assignments":
+                key = ("assignments", change.username)
+                entry = self._entries.get(key)
+                if entry is not None and only in (None, key):
+                    apply_user_assignment_change(entry[1], change)
+
+    @instrument.timed()
+    def _write_pending(self):
+        # runs on the writer thread (or the caller's, for apply without the writer or with wait):
+        # take a snapshot under the lock, write it without the lock
+        with self._write_lock:
+            self._write_locked()
+
+    def _write_locked(self):
+        with self.lock:
+            collections = set(self._dirty)
+            full = {c: (self._entries[(c, None)][0], snapshot(c, self._entries[(c, None)][1])) for c in self._full_saves}
+            replaced = set(self._replaced)
+            bases = {key: entry[0] for key, entry in self._entries.items() if key[0] in collections and key[0] not in full}
+            work, self._pending = self._pending, []
+            self._inflight = work
+            self._full_saves.clear()
+            self._replaced.clear()
+            self._dirty.clear()
+            self._writing.update(collections)
+
+        saved, unchanged, conflicts = set(), set(), []
+        try:
+            with self.backend.locked():
+                for collection, (base, data) in full.items():
+                    if collection in replaced or self.backend.signature(collection) == base:
+                        self.backend.save_collection(collection, data)
+                        saved.add(collection)
+                unchanged = {key for key, base in bases.items() if self.backend.signature(*key) == base}
+                records = [change for change in work if change.collection not in saved]
+                if records:
+                    try:
+                        self.backend.apply(records)
+                    except ConflictError as e:
+                        conflicts = e.conflicts
+        except Exception:
+            with self.lock:
+                # keep the changes so the next flush tries them again
+                self._writing.difference_update(collections)
+                self._dirty.update(collections)
+                self._full_saves.update(c for c in full if c not in saved and (c, None) in self._entries)
+                self._replaced.update(replaced - saved)
+                self._pending[:0] = [change for change in work if change.collection not in saved]
+                self._inflight = []
+            raise
+
+        with self.lock:
+            self._writing.difference_update(collections)
+            self._inflight = []
+            outdated = {collection for collection in full if collection not in saved}
+            outdated.update(change.collection for change in conflicts)
+            for key in list(self._entries):
+                if key[0] not in collections or key[0] in self._replaced:
+                    continue
+                if key[0] in saved or (key in unchanged and key[0] not in outdated):
+                    self._store(key, self._entries[key][1])
+                else:
+                    # someone else wrote this since we read it: reload (with our queued changes on top) next time
+                    del self._entries[key]
+                    self._full_saves.discard(key[0])
+            for change in conflicts:
+                if id(change) in self._waiting:
+                    self._conflicted[id(change)] = change
+            conflicts = [change for change in conflicts if id(change) not in self._waiting]
+        if conflicts:
+            raise ConflictError(conflicts)
+
+    def _drop(self, collection):
+        for key in list(self._entries):
+            if key[0] == collection:
+                del self._entries[key]
+
+    def invalidate(self):
+        # forgets every cached copy without unsaved changes so the next load reads from the backend
+        with self.lock:
+            for key in list(self._entries):
+                if not self._unsaved(key[0]):
+                    del self._entries[key]
+
+    def flush(self, wait=True):
+        # writes out everything that is still queued. With wait it returns once that is on disk and
+        # raises the error when it can't be (the changes stay queued for the next try).
+        if self.writer is not None:
+            self.writer.flush(wait)
+        if wait and self._has_unsaved():
+            self._write_pending()
+
+    def _has_unsaved(self):
+        with self.lock:
+            return bool(self._pending or self._dirty)
+
+    def close(self):
+        # writes out what is left and closes the backend; raises (after closing) when something
+        # couldn't be saved, so the caller can tell the user
+        try:
+            if self.writer is not None:
+                self.writer.close()
+            if self._has_unsaved():
+                self._write_pending()
+        finally:
+            self.backend.close()
+
+
+def snapshot(collection, data):
+    # copies the structure of a cached collection so the writer can serialize it while the app
+    # keeps changing the original; records are always replaced, never edited in place
+    if collection == "assignments":
+        return {username: dict(user_data, assignments=dict(user_data.get("assignments", {})))
+                for username, user_data in data.items()}
+    return dict(data)
@@ -0,0 +1,224 @@
+# The assignment tracker without the window: opening the data files, signing in, managing users and
+# adding, editing, completing and deleting assignments. main.py's pages and the command line
+# (python -m tracker) both go through Tracker, so neither Tk nor PIL is imported here.
+import os
+
+from tracker import importer, storage
+from tracker.cache import CachedBackend
+from tracker.index import AssignmentIndex
+from tracker.models import Assignment, parse_due_date
+
+USER_FILE = "users.json"
+SETTINGS_FILE = "users_settings.json"
+ASSIGNMENTS_FILE = "assignments.json"
+DATABASE_FILE = "tracker.db"
+ASSIGNMENTS_DIR = "assignments"
+
+ROLES = ("student", "admin")
+
+
+class TrackerError(ValueError):
+    # a request that can't be done (wrong password, unknown user, ...); the message is shown to the user
+    pass
+
+
+def open_backend(data_dir=".", backend_name=None, file_format=None, write_behind=False):
+    # the cached storage backend for the data files in data_dir; the backend and file format
+    # default to the TRACKER_BACKEND and TRACKER_FORMAT environment variables
+    backend_name = backend_name or os.environ.get("TRACKER_BACKEND", "json")
+    file_format = file_format or os.environ.get("TRACKER_FORMAT", "json")
+    files = [os.path.join(data_dir, name) for name in
+             (USER_FILE, SETTINGS_FILE, ASSIGNMENTS_FILE, DATABASE_FILE, ASSIGNMENTS_DIR)]
+    return CachedBackend(storage.open_backend(backend_name, *files, file_format=file_format),
+                         write_behind=write_behind)
+
+
+def validate_assignment(title, due_date):
+    # raises TrackerError when an assignment can't be saved with this title and due date
+    if not title:
+        raise TrackerError("An assignment needs a title.")
+    if parse_due_date(due_date) is None:
+        raise TrackerError(f"'{due_date}' is not a date (expected YYYY-MM-DD).")
+
+
+def filter_assignments(assignments, class_name=None, completed=None, due_from=None, due_to=None,
+                       assignment_type=None, priority=None):
+    # the assignments matching every given filter; due_from/due_to are inclusive dates
+    for a in assignments:
+        if class_name is not None and a.class_name != class_name:
+            continue
+        if assignment_type is not None and a.assignment_type != assignment_type:
+            continue
+        if completed is not None and bool(a.completed) != completed:
+            continue
+        if priority is not None and bool(a.priority) != priority:
+            continue
+        if due_from is not None and (a.due is None or a.due < due_from):
+            continue
+        if due_to is not None and (a.due is None or a.due > due_to):
+            continue
+        yield a
+
+
+class Tracker:
+    # The tracker's operations on top of a storage backend. Methods raise TrackerError with a
+    # message for the user when something can't be done.
+    def __init__(self, backend):
+        self.backend = backend
+
+    def close(self):
+        self.backend.close()
+
+    # users
+
+    def users(self):
+        return self.backend.load_users()
+
+    def user(self, username):
+        # the user's record with their username added, or None
+        record = self.backend.load_users().get(username)
+        return None if record is None else dict(record, username=username)
+
+    def authenticate(self, username, password):
+        # the signed in user's record (with their username), or None if the credentials are wrong
+        user = self.user(username)
+        if user is None or user.get("password") != password:
+            return None
+        return user
+
+    def is_admin(self, username):
+        return (self.backend.load_users().get(username, {}).get("role") or "").lower() == "admin"
+
+    def sign_up(self, first_name, last_name, username, password, confirm_password=None, role="student"):
+        # creates an account together with its default settings
+        if not all([first_name, last_name, username, password]):
+            raise TrackerError("All fields must be filled.")
+        if confirm_password is not None and password != confirm_password:
+            raise TrackerError("Passwords do not match.")
+        if role not in ROLES:
+            raise TrackerError(f"Role must be one of: {', '.join(ROLES)}.")
+        if username in self.backend.load_users():
+            raise TrackerError("Username already exists.")
+        # version 0: only created if nobody else took the username in the meantime; written before
+        # returning (even with write-behind) so that a taken username is reported here
+        try:
+            self.backend.apply([
+                storage.Change("users", username, None, {
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "password": password,
+                    "role": role
+                }, 0),
+                storage.Change("settings", username, None, {
+                    "password": password,
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "profile_picture": "",
+                    "default_view": ""
+                }, 0),
+            ], wait=True)
+        except storage.ConflictError:
+            raise TrackerError("Username already exists.")
+
+    def reset_password(self, username, new_password, confirm_password=None):
+        # changes the password in both the user's record and their settings
+        users = self.backend.load_users()
+        if username not in users:
+            raise TrackerError("Username not found.")
+        if confirm_password is not None and new_password != confirm_password:
+            raise TrackerError("Passwords do not match. Please try again")
+        settings = self.backend.load_settings().get(username)
+        try:
+            self.backend.apply([
+                storage.Change("users", username, None, dict(users[username], password=new_password),
+                               storage.record_version(users[username])),
+                storage.Change("settings", username, None, dict(settings or {}, password=new_password),
+                               storage.record_version(settings)),
+            ], wait=True)
+        except storage.ConflictError:
+            raise TrackerError("The account was changed by someone else in the meantime. Please try again.")
+
+    def delete_user(self, username):
+        # deletes the user together with their assignments and settings
+        if username not in self.backend.load_users():
+            raise TrackerError(f"User '{username}' does not exist.")
+        self.backend.delete_user(username)
+
+    # settings
+
+    def settings(self, username):
+        return self.backend.load_settings().get(username, {})
+
+    def update_settings(self, username, **fields):
+        current = self.backend.load_settings().get(username)
+        settings = dict(current or {})
+        settings.update(fields)
+        self.backend.put_settings(username, settings, storage.record_version(current))
+        return settings
+
+    def default_view(self, username):
+        return self.settings(username).get("default_view") or "Home"
+
+    # assignments
+
+    def assignments(self, username):
+        # the user's assignments, indexed by id, due date, class and month
+        user_assignments = self.backend.load_user_assignments(username)
+        return AssignmentIndex(Assignment.from_dict(a, key) for key, a in user_assignments.items())
+
+    def progress(self, username):
+        # the user's completion counts (see tracker.progress.Progress)
+        return self.assignments(username).progress
+
+    def add_assignment(self, username, title, due_date, class_name, assignment_type, completed=False, priority=False):
+        validate_assignment(title, due_date)
+        a = Assignment(title, due_date, class_name, assignment_type, completed=completed, priority=priority)
+        self.save_assignment(username, a)
+        return a
+
+    def save_assignment(self, username, assignment):
+        # saves a new or edited assignment; raises storage.ConflictError (right away, or from the
+        # writer with write-behind) if the saved record was changed elsewhere since it was read
+        self.backend.put_assignment(username, assignment.id, assignment.to_dict(), assignment.version)
+        assignment.version += 1
+
+    def add_assignments(self, username, assignments):
+        # saves many new assignments with one write
+        changes = [storage.Change("assignments", username, a.id, a.to_dict(), a.version) for a in assignments]
+        self.backend.apply(changes)
+        for a in assignments:
+            a.version += 1
+
+    def import_file(self, username, path, class_name=None, assignment_type=None):
+        # imports the assignments of a .csv or .ics file (see tracker.importer) in one write;
+        # returns (the added assignments, [(line number, error)] for the rows that were skipped)
+        if self.user(username) is None:
+            raise TrackerError(f"User '{username}' does not exist.")
+        try:
+            assignments, errors = importer.build(importer.read_file(path), class_name, assignment_type)
+        except (OSError, ValueError) as e:
+            raise TrackerError(f"Can't import {os.path.basename(path)}: {e}")
+        if assignments:
+            self.add_assignments(username, assignments)
+        return assignments, errors
+
+    def set_completed(self, username, assignment_ids, completed=True):
+        # marks the assignments as (not) completed in one write; returns the updated assignments
+        current = self.backend.load_user_assignments(username)
+        updated, changes = [], []
+        for assignment_id in assignment_ids:
+            if assignment_id not in current:
+                raise TrackerError(f"No assignment with id '{assignment_id}'.")
+            a = Assignment.from_dict(current[assignment_id], assignment_id)
+            a.completed = completed
+            updated.append(a)
+            changes.append(storage.Change("assignments", username, a.id, a.to_dict(), a.version))
+            a.version += 1
+        self.backend.apply(changes)
+        return updated
+
+    def delete_assignments(self, username, assignment_ids):
+        # deletes the assignments in one write
+        changes = [storage.Change("assignments", username, assignment_id, None) for assignment_id in assignment_ids]
+        if changes:
+            self.backend.apply(changes)
@@ -0,0 +1,95 @@
+# Serialization formats for users.json, users_settings.json and the assignment files.
+#
+#   json          indented json, the layout the app has always written (default)
+#   json-compact  json without indentation or spaces
+#   orjson        compact json written by orjson (pip install orjson), falls back to json-compact
+#   msgpack       binary MessagePack (pip install msgpack)
+#
+# Files are read by looking at their first byte, so a data directory can be switched to another
+# format (or converted back) without renaming anything:
+#
+#   python -m tracker.formats --to msgpack users.json users_settings.json assignments.json
+import argparse
+import json
+import os
+
+from tracker.locking import FileLock
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+FORMATS = ("json", "json-compact", "orjson", "msgpack")
+
+
+def detect(raw):
+    # "msgpack" if the bytes start with a MessagePack map, otherwise "json"
+    if raw and (0x80 <= raw[0] <= 0x8f or raw[0] in (0xde, 0xdf)):
+        return "msgpack"
+    return "json"
+
+
+def loads(raw):
+    # decodes the contents of a data file in whichever format it was written
+    if detect(raw) == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("This data file is in MessagePack format; install msgpack to read it.")
+        return msgpack.unpackb(raw)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(data, file_format="json"):
+    # encodes data as bytes in the requested format
+    if file_format == "json":
+        return json.dumps(data, indent=4).encode("utf-8")
+    if file_format == "orjson" and orjson is not None:
+        return orjson.dumps(data)
+    if file_format in ("json-compact", "orjson"):
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+    if file_format == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("The msgpack format needs the msgpack package (pip install msgpack).")
+        return msgpack.packb(data)
+    raise ValueError(f"Unknown file format '{file_format}', expected one of {', '.join(FORMATS)}")
+
+
+def file_format(path):
+    # the format of an existing file, from its first byte
+    with open(path, "rb") as f:
+        return detect(f.read(1))
+
+
+def main(argv=None):
+    # rewrites data files in another format
+    parser = argparse.ArgumentParser(description="Convert assignment tracker data files to another format.")
+    parser.add_argument("--to", dest="target", required=True, choices=FORMATS)
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    # imported here because storage itself uses this module
+    from tracker.storage import LOCK_FILE, atomic_write
+
+    for path in args.files:
+        # holds the data directory's lock so a running app can't save the file between the read and the rewrite
+        with FileLock(os.path.join(os.path.dirname(os.path.abspath(path)), LOCK_FILE)):
+            with open(path, "rb") as f:
+                raw = f.read()
+            try:
+                converted = dumps(loads(raw), args.target)
+            except RuntimeError as e:
+                parser.exit(1, f"{path}: {e}\n")
+            atomic_write(path, converted)
+        print(f"{path}: {len(raw)} -> {len(converted)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Bulk import of assignments from CSV files and iCalendar (.ics) exports such as course syllabi.
+#
+# The rows are streamed from the file, all of them are checked first (a bad row is reported with its
+# line number instead of stopping the import) and the good ones are saved with one backend.apply
+# (Tracker.import_file), so importing thousands of rows is a single write. Used by the Table page's
+# Import button and by
+#
+#   python -m tracker import alice syllabus.csv
+#   python -m tracker import alice english.ics --class English
+#
+# CSV files need a header row. Columns are matched by name, case-insensitively: title, due_date (or
+# due/date), class_name (or class/course), assignment_type (or type/category), completed, priority.
+# In .ics files every VTODO and VEVENT becomes an assignment: SUMMARY is the title, DUE (or DTSTART)
+# the due date, the first CATEGORIES value the type, STATUS:COMPLETED marks it completed and
+# PRIORITY 1-4 (the iCalendar "high" range) makes it a priority. The class is the one given to the
+# import, or else the calendar's name.
+import csv
+import os
+import re
+from datetime import date
+
+from tracker.models import Assignment, parse_due_date
+
+CSV_COLUMNS = {
+    "title": "title", "name": "title", "assignment": "title",
+    "due_date": "due_date", "due": "due_date", "date": "due_date", "due date": "due_date",
+    "class_name": "class_name", "class": "class_name", "course": "class_name", "class name": "class_name",
+    "assignment_type": "assignment_type", "type": "assignment_type", "category": "assignment_type",
+    "completed": "completed", "done": "completed",
+    "priority": "priority",
+}
+TRUE_WORDS = {"1", "true", "yes", "y", "x", "done", "completed", "high", "★"}
+ICS_DATE = re.compile(r"(\d{4})(\d{2})(\d{2})")
+
+
+def is_true(value):
+    return str(value).strip().lower() in TRUE_WORDS
+
+
+def read_csv(path):
+    # yields (line number, fields) for every data row
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [CSV_COLUMNS.get(name.strip().lower()) for name in header]
+        if "title" not in columns or "due_date" not in columns:
+            raise ValueError(f"{os.path.basename(path)} needs a header row with at least a title and a due date column")
+        try:
+            for row in reader:
+                if not any(cell.strip() for cell in row):
+                    continue
+                fields = {column: cell.strip() for column, cell in zip(columns, row) if column is not None}
+                yield reader.line_num, fields
+        except csv.Error as e:
+            raise ValueError(f"line {reader.line_num}: {e}")
+
+
+def unescape(text):
+    # undoes iCalendar TEXT escaping (\\, \; \, \n)
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+def ics_lines(f):
+    # yields (line number, unfolded content line); a line starting with a space or tab continues the previous one
+    current, start = None, 0
+    for number, line in enumerate(f, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = line, number
+    if current is not None:
+        yield start, current
+
+
+def read_ics(path):
+    # yields (line number, fields) for every VTODO and VEVENT
+    calendar_name = ""
+    component, fields, start = None, None, 0
+    with open(path, encoding="utf-8-sig") as f:
+        for number, line in ics_lines(f):
+            name, _, value = line.partition(":")
+            name = name.partition(";")[0]
+            name = name.upper()
+            if name == "X-WR-CALNAME" and component is None:
+                calendar_name = unescape(value)
+            elif name == "BEGIN" and value.upper() in ("VTODO", "VEVENT") and component is None:
+                component, fields, start = value.upper(), {}, number
+            elif component is None:
+                continue
+            elif name == "END" and value.upper() == component:
+                fields["calendar"] = calendar_name
+                if "due_date" not in fields:
+                    fields["due_date"] = fields.pop("start", "")
+                fields.pop("start", None)
+                yield start, fields
+                component = None
+            elif name == "SUMMARY":
+                fields["title"] = unescape(value).strip()
+            elif name in ("DUE", "DTSTART"):
+                match = ICS_DATE.match(value)
+                key = "due_date" if name == "DUE" else "start"
+                fields[key] = "-".join(match.groups()) if match else value
+            elif name == "CATEGORIES":
+                fields["assignment_type"] = unescape(re.split(r"(?<!\\),", value)[0]).strip()
+            elif name == "STATUS":
+                fields["completed"] = value.strip().upper() == "COMPLETED"
+            elif name == "PRIORITY":
+                fields["priority"] = value.strip() in ("1", "2", "3", "4")
+
+
+def read_file(path):
+    # the rows of a .csv or .ics file, by its extension
+    if os.path.splitext(path)[1].lower() in (".ics", ".ical", ".ifb"):
+        return read_ics(path)
+    return read_csv(path)
+
+
+def build(rows, class_name=None, assignment_type=None):
+    # checks every row and returns (assignments, [(line number, error)]); class_name and
+    # assignment_type fill in rows that don't have them
+    assignments, errors = [], []
+    for line, fields in rows:
+        title = fields.get("title", "")
+        due_date = fields.get("due_date", "")
+        if not title:
+            errors.append((line, "no title"))
+            continue
+        due = parse_due_date(due_date)
+        due_date = due.isoformat() if due is not None else normalize_date(due_date)
+        if due_date is None:
+            errors.append((line, f"'{fields.get('due_date', '')}' is not a date (expected YYYY-MM-DD)"))
+            continue
+        assignments.append(Assignment(
+            title, due_date,
+            fields.get("class_name") or class_name or fields.get("calendar") or "",
+            fields.get("assignment_type") or assignment_type or "",
+            completed=is_true(fields.get("completed", False)),
+            priority=is_true(fields.get("priority", False)),
+        ))
+    return assignments, errors
+
+
+def normalize_date(text):
+    # the ISO form of a few other common date spellings (2025/03/01, 03/01/2025), or None
+    text = text.strip()
+    for pattern, order in ((r"(\d{4})[/.](\d{1,2})[/.](\d{1,2})$", (0, 1, 2)),
+                           (r"(\d{1,2})/(\d{1,2})/(\d{4})$", (2, 0, 1))):
+        match = re.match(pattern, text)
+        if match:
+            parts = [int(match.group(i + 1)) for i in order]
+            try:
+                return date(*parts).isoformat()
+            except ValueError:
+                return None
+    return None
+
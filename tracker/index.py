@@ -0,0 +1,144 @@
+from tracker.progress import Progress
+from tracker.search import SearchIndex
+from tracker.sorting import SortedColumns
+
+ADDED = "added"
+UPDATED = "updated"
+REMOVED = "removed"
+
+
+class AssignmentIndex:
+    # The logged in user's assignments keyed by their id, with secondary indexes by due date and
+    # by class so that lookups, edits and deletes never have to scan the whole list.
+    # Iterating gives the assignments in the order they were added.
+    #
+    # Every change bumps `version` and is kept in a short log and sent to the listeners as
+    # (kind, old, new), so a page that remembers the version it last showed can catch up with
+    # changes_since() instead of redrawing everything.
+    MAX_LOG = 1024  # changes kept for changes_since(); older pages are told to rebuild
+
+    def __init__(self, assignments=()):
+        self.by_id = {}
+        self.by_due_date = {}  # due date -> {id: assignment}
+        self.by_class = {}  # class name -> {id: assignment}
+        self.by_month = {}  # (year, month) -> {id: assignment}, only for valid due dates
+        for a in assignments:
+            self._link(a)
+        self.version = 0
+        self.log = []  # (version, assignment id) of the most recent changes
+        self.listeners = []  # called with (kind, old, new) after every change
+        self._progress = None
+        self._search = None
+        self._sorting = None
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, assignment_id):
+        return assignment_id in self.by_id
+
+    def get(self, assignment_id):
+        return self.by_id.get(assignment_id)
+
+    def prepare(self):
+        # builds the progress counts and the search index now (e.g. on a loader thread, before the
+        # index is shared) instead of on first use
+        self.progress
+        self.search
+
+    @property
+    def progress(self):
+        # completion counts overall and by class, type and week; counted on first use and then
+        # kept up to date by every add, edit and remove
+        if self._progress is None:
+            self._progress = Progress(self)
+            self.listeners.append(self._progress.on_change)
+        return self._progress
+
+    @property
+    def search(self):
+        # word prefix index over title, class and type; built on first use, then kept up to date
+        if self._search is None:
+            self._search = SearchIndex(self)
+            self.listeners.append(self._search.on_change)
+        return self._search
+
+    @property
+    def sorting(self):
+        # the assignments sorted by each table column, kept up to date once a column has been used
+        if self._sorting is None:
+            self._sorting = SortedColumns(self)
+            self.listeners.append(self._sorting.on_change)
+        return self._sorting
+
+    def add(self, a):
+        # adds an assignment, or replaces the one with the same id while keeping its place
+        old = self._link(a)
+        self._changed(ADDED if old is None else UPDATED, old, a)
+        return old
+
+    replace = add
+
+    def remove(self, assignment_id):
+        # removes and returns the assignment with this id (None if there isn't one)
+        a = self.by_id.pop(assignment_id, None)
+        if a is not None:
+            self._unlink(a)
+            self._changed(REMOVED, a, None)
+        return a
+
+    def changes_since(self, version):
+        # ids of the assignments changed after `version`, oldest change first, or None when the
+        # log no longer goes back that far
+        if version == self.version:
+            return []
+        if not self.log or self.log[0][0] > version + 1:
+            return None
+        changed = {}
+        for v, assignment_id in reversed(self.log):
+            if v <= version:
+                break
+            changed[assignment_id] = None
+        return list(reversed(changed))
+
+    def _changed(self, kind, old, new):
+        self.version += 1
+        self.log.append((self.version, (new or old).id))
+        if len(self.log) > self.MAX_LOG:
+            del self.log[:len(self.log) - self.MAX_LOG // 2]
+        for listener in self.listeners:
+            listener(kind, old, new)
+
+    def _link(self, a):
+        old = self.by_id.get(a.id)
+        if old is not None:
+            self._unlink(old)
+        self.by_id[a.id] = a
+        self.by_due_date.setdefault(a.due_date, {})[a.id] = a
+        self.by_class.setdefault(a.class_name, {})[a.id] = a
+        if a.due is not None:
+            self.by_month.setdefault((a.due.year, a.due.month), {})[a.id] = a
+        return old
+
+    def _unlink(self, a):
+        month = (a.due.year, a.due.month) if a.due is not None else None
+        for index, key in ((self.by_due_date, a.due_date), (self.by_class, a.class_name), (self.by_month, month)):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(a.id, None)
+                if not bucket:
+                    del index[key]
+
+    def due_on(self, due_date):
+        # assignments due on a "YYYY-MM-DD" date
+        return list(self.by_due_date.get(due_date, {}).values())
+
+    def due_in_month(self, year, month):
+        # assignments due in the given month
+        return list(self.by_month.get((year, month), {}).values())
+
+    def in_class(self, class_name):
+        return list(self.by_class.get(class_name, {}).values())
@@ -0,0 +1,143 @@
+# Optional timing of the app's hot paths (loads, saves, page switches and refreshes).
+#
+# Turned on with TRACKER_PROFILE=1 or `python main.py --profile`. When it is off, timed() hands
+# back the undecorated function and span() returns one shared object that does nothing, so the
+# app pays close to nothing for it. When it is on, the numbers can be seen on the hidden
+# diagnostics page (Ctrl+Shift+D) and are written to TRACKER_PROFILE_FILE when the app exits.
+import atexit
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get("TRACKER_PROFILE", "") not in ("", "0") or "--profile" in sys.argv
+DUMP_FILE = os.environ.get("TRACKER_PROFILE_FILE", "tracker-profile.json")
+MAX_SAMPLES = 4096  # latencies kept per name for the percentiles (a random sample once there are more)
+
+_lock = threading.Lock()
+_stats = {}
+
+
+class Stat:
+    __slots__ = ("count", "total", "samples", "bytes_read", "bytes_written")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = []
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def add(self, seconds, bytes_read, bytes_written):
+        self.count += 1
+        self.total += seconds
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = seconds
+
+    def summary(self):
+        ordered = sorted(self.samples)
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0.0
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "p50_ms": percentile(50) * 1000,
+            "p95_ms": percentile(95) * 1000,
+            "p99_ms": percentile(99) * 1000,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+
+def record(name, seconds, bytes_read=0, bytes_written=0):
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = Stat()
+        stat.add(seconds, bytes_read, bytes_written)
+
+
+class _Span:
+    # times a with block; set bytes_read/bytes_written inside it to count I/O
+    __slots__ = ("name", "start", "bytes_read", "bytes_written")
+
+    def __init__(self, name):
+        self.name = name
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start, self.bytes_read, self.bytes_written)
+
+
+class _NullSpan:
+    # what span() returns when instrumentation is off
+    bytes_read = bytes_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    return _Span(name) if ENABLED else _NULL_SPAN
+
+
+def timed(name=None):
+    # decorator that records every call of the function under name (default: its qualified name)
+    def decorate(function):
+        if not ENABLED:
+            return function
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    # name -> summary dictionary of everything recorded so far
+    with _lock:
+        return {name: stat.summary() for name, stat in sorted(_stats.items())}
+
+
+def dump(path=None):
+    with open(path or DUMP_FILE, "w") as f:
+        json.dump(snapshot(), f, indent=4)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+if ENABLED:
+    atexit.register(dump)
@@ -0,0 +1,100 @@
+# Append-only journal of assignment changes, kept next to the assignments snapshot.
+#
+# Every saved change is one json line {"ts", "op", "user", "id", "record"} appended (and fsynced)
+# to assignments.journal, so a save costs about the size of the record instead of rewriting the
+# whole assignments file. Loading reads the snapshot and replays the journal over it; once the
+# journal grows past COMPACT_MIN_BYTES and COMPACT_RATIO of the snapshot, the backend folds it into
+# a new snapshot and starts an empty journal (see JsonBackend.compact).
+#
+# Replaying is idempotent (every line sets or removes whole records), so a crash between writing the
+# new snapshot and emptying the journal loses nothing. A crash in the middle of an append leaves a
+# line without its newline at the end; readers skip it and the next append cuts it off.
+import json
+import os
+import time
+
+COMPACT_MIN_BYTES = 1 << 20
+COMPACT_RATIO = 0.5
+
+OPS = {"put", "delete", "replace"}
+
+
+def journal_path(snapshot_path):
+    return os.path.splitext(snapshot_path)[0] + ".journal"
+
+
+def entry(change):
+    # the journal line for an assignment Change
+    if change.key is None:
+        op = "replace"  # all of the user's assignments (record None drops the user)
+    elif change.record is None:
+        op = "delete"
+    else:
+        op = "put"
+    return json.dumps({"ts": round(time.time(), 3), "op": op, "user": change.username, "id": change.key,
+                       "record": change.record}, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = path
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def entries(self, username=None):
+        # yields (username, key, record) for every complete line, oldest first; with a username
+        # only that user's lines (the others are skipped without being decoded)
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        marker = f'"user":{json.dumps(username, ensure_ascii=False)},'.encode() if username is not None else None
+        with f:
+            for number, line in enumerate(f, 1):
+                if not line.endswith(b"\n"):
+                    break  # torn by a crash during the append, never acknowledged
+                if marker is not None and marker not in line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    raise ValueError(f"{self.path} line {number} is corrupt")
+                if item.get("op") not in OPS:
+                    raise ValueError(f"{self.path} line {number} has an unknown op {item.get('op')!r}")
+                if username is None or item["user"] == username:
+                    yield item["user"], item["id"], item["record"]
+
+    def append(self, changes):
+        # writes the lines for a batch of changes in one write and waits until they are on disk;
+        # the caller holds the data directory lock. Returns the number of bytes appended.
+        data = "".join(entry(change) for change in changes).encode("utf-8")
+        with open(self.path, "ab+") as f:
+            self._recover_tail(f)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(data)
+
+    def _recover_tail(self, f):
+        # cuts off a line left unfinished by a crash, so the next line starts on its own
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        position = end
+        while position > 0:
+            start = max(0, position - 65536)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
@@ -0,0 +1,98 @@
+import json
+import os
+import re
+
+
+# Reads the top level {"username": {...}, ...} object of a big json file one entry at a time,
+# so that memory stays around one chunk of the file plus one user's data instead of several
+# times the size of the whole document. Each entry is still decoded by the C json decoder.
+
+STREAMING_THRESHOLD = 4 << 20  # files smaller than this are simply read with json.load
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"\s*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+
+    def fill(self):
+        # drops the text before the current position and reads more of the file. It reads at least
+        # as much as is still unread, so a value that does not fit is only retried a few times.
+        chunk = self.f.read(max(CHUNK_SIZE, len(self.buf) - self.pos))
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        # skips whitespace and returns the next character ("" at the end of the file)
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # a number cut off by the end of the buffer decodes too ("12" of "123", "2.5" of
+                # "2.5e3"), so one followed only by number characters up to the end may continue
+                if _NUMBER_TAIL.match(self.buf, end).end() < len(self.buf):
+                    break
+            except json.JSONDecodeError:
+                pass  # most likely cut off by the end of the buffer
+            if not self.fill():
+                value, end = _decoder.raw_decode(self.buf, self.pos)  # raises the real error, if any
+                break
+        self.pos = end
+        return value
+
+
+def iter_items(path):
+    # lazily yields every (key, value) pair of the top level object, one at a time
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            if reader.peek() != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes",
+                                           reader.buf, reader.pos)
+            key = reader.read_value()
+            reader.expect(":")
+            yield key, reader.read_value()
+
+            char = reader.peek()
+            reader.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", reader.buf, reader.pos - 1)
+
+
+def load_section(path, key, default=None):
+    # returns the value stored under one top level key, keeping only one entry in memory at a
+    # time and stopping as soon as it is found; small files are read with json.load
+    if os.path.getsize(path) < STREAMING_THRESHOLD:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get(key, default)
+    for k, value in iter_items(path):
+        if k == key:
+            return value
+    return default
@@ -0,0 +1,70 @@
+# Cross-process locking for a shared data directory.
+#
+# Writers hold an exclusive flock on a lock file while they read, change and write a data file, so
+# two app instances can't both rewrite it from the same old copy. Readers never take the lock: the
+# data files are replaced atomically (see storage.atomic_write), so they always see a whole file.
+# On systems without fcntl (Windows) the lock only works between threads of one process.
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    # An exclusive lock on `path` that the same thread can take again while holding it (the cache
+    # locks around a write that the backend then locks again); other threads and processes wait.
+    # Every FileLock on the same path in one process shares its state, so a command that locks the
+    # data directory (migrate, formats) can use backends that lock it again with their own FileLock.
+    def __init__(self, path):
+        self.path = path
+        with _registry_lock:
+            self._held = _registry.setdefault(os.path.abspath(path), _Held())
+
+    def acquire(self):
+        held = self._held
+        held.thread_lock.acquire()
+        if held.depth == 0:
+            try:
+                if fcntl is not None:
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    except BaseException:
+                        os.close(fd)
+                        raise
+                    held.fd = fd
+            except BaseException:
+                held.thread_lock.release()
+                raise
+        held.depth += 1
+
+    def release(self):
+        held = self._held
+        held.depth -= 1
+        if held.depth == 0 and held.fd is not None:
+            fd, held.fd = held.fd, None
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        held.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _Held:
+    # the state of one lock file in this process
+    def __init__(self):
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+
+
+_registry = {}  # absolute lock file path -> _Held
+_registry_lock = threading.Lock()
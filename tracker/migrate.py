@@ -0,0 +1,46 @@
+# One-shot migration of the tracker data between storage backends.
+#
+#   python -m tracker.migrate --to sqlite
+#   python -m tracker.migrate --to sharded
+#
+# copies users.json, users_settings.json and assignments.json into tracker.db, or splits
+# assignments.json into one file per user inside the assignments/ folder
+import argparse
+import os
+
+from tracker import formats, storage
+from tracker.locking import FileLock
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copy the assignment tracker data between storage backends.")
+    parser.add_argument("--from", dest="source", default="json", choices=storage.BACKENDS)
+    parser.add_argument("--to", dest="target", default="sqlite", choices=storage.BACKENDS)
+    parser.add_argument("--users", default="users.json")
+    parser.add_argument("--settings", default="users_settings.json")
+    parser.add_argument("--assignments", default="assignments.json")
+    parser.add_argument("--database", default="tracker.db")
+    parser.add_argument("--shard-dir", default="assignments")
+    parser.add_argument("--format", default="json", choices=formats.FORMATS,
+                        help="file format the target backend writes")
+    args = parser.parse_args(argv)
+
+    if args.source == args.target:
+        parser.error("--from and --to must be different backends")
+
+    files = (args.users, args.settings, args.assignments, args.database, args.shard_dir)
+    source = storage.open_backend(args.source, *files)
+    target = storage.open_backend(args.target, *files, file_format=args.format)
+    try:
+        # nobody may save to the data directory while it is copied (the backends lock it again themselves)
+        with FileLock(os.path.join(os.path.dirname(os.path.abspath(args.users)), storage.LOCK_FILE)):
+            storage.migrate(source, target)
+    finally:
+        source.close()
+        target.close()
+
+    print(f"Migrated {args.source} data to {args.target}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import sys
+import uuid
+from datetime import date
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def parse_due_date(text):
+    # parses a "YYYY-MM-DD" due date, or returns None if the text isn't one;
+    # cached because thousands of assignments share a few hundred due dates
+    try:
+        return date.fromisoformat(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def shared_text(value):
+    # an interned string for a class name or type; a record with some other value (hand edited,
+    # or saved by an older version) is shown as text instead of stopping the user's whole login
+    if isinstance(value, str):
+        return sys.intern(value)
+    return "" if value is None else str(value)
+
+
+class Assignment:
+    # The assignment model used everywhere in the app. __slots__ keeps each instance small and the
+    # due date text is parsed once when it is set: `due` holds it as a date (None when the text is
+    # not a valid date) so pages can sort and group by it without calling strptime again.
+    __slots__ = ("id", "title", "_due_date", "due", "class_name", "assignment_type", "completed", "priority", "version")
+
+    def __init__(self, title, due_date, class_name, assignment_type, completed=False, priority=False, assignment_id=None,
+                 version=0):
+        # Defines the fields for the Assignment class
+        self.id = assignment_id or uuid.uuid4().hex # stays the same for the life of the assignment, even if its title changes
+        self.title = title
+        self.due_date = due_date
+        self.class_name = class_name
+        self.assignment_type = assignment_type
+        self.completed = completed
+        self.priority = priority  # add priority to make it go 'to do' list
+        self.version = version  # version of the saved record this was read from, 0 if it isn't saved yet (see storage.Change)
+
+    @property
+    def due_date(self):
+        return self._due_date
+
+    @due_date.setter
+    def due_date(self, value):
+        self._due_date = value
+        self.due = parse_due_date(value)
+
+    def to_dict(self):
+        # the record that is saved for this assignment
+        return {
+            "id": self.id,
+            "title": self.title,
+            "due_date": self._due_date,
+            "class_name": self.class_name,
+            "assignment_type": self.assignment_type,
+            "completed": self.completed,
+            "priority": self.priority,
+        }
+
+    @classmethod
+    def from_dict(cls, data, key=None):
+        # builds an assignment from a saved record without going through __init__; records saved
+        # before assignments had ids are stored under their title, which becomes their id
+        a = cls.__new__(cls)
+        a.id = data.get("id") or key or uuid.uuid4().hex
+        a.title = data["title"]
+        due_date = data["due_date"]
+        a._due_date = due_date
+        a.due = parse_due_date(due_date)
+        # class names and types repeat across many assignments, so share one string for each
+        a.class_name = shared_text(data.get("class_name"))
+        a.assignment_type = shared_text(data.get("assignment_type"))
+        a.completed = data.get("completed", False)
+        a.priority = data.get("priority", False)
+        a.version = data.get("version", 1)
+        return a
+
+    def __repr__(self):
+        return f"Assignment({self.title!r}, {self._due_date!r}, {self.class_name!r}, {self.assignment_type!r})"
@@ -0,0 +1,81 @@
+# Completion counts for a user's assignments: overall, per class, per assignment type and per ISO week
+# of the due date. They are counted once and then kept up to date from the AssignmentIndex's change
+# events, so reading them never goes over the assignments again (see AssignmentIndex.progress).
+GROUPINGS = ("class", "type", "week")
+
+
+def week_of(a):
+    # the (ISO year, ISO week) the assignment is due in, or None without a valid due date
+    if a.due is None:
+        return None
+    year, week, _ = a.due.isocalendar()
+    return (year, week)
+
+
+def week_label(week):
+    return f"{week[0]}-W{week[1]:02d}"
+
+
+def percent(completed, total):
+    return completed / total * 100 if total else 0.0
+
+
+class Progress:
+    def __init__(self, assignments=()):
+        self.total = 0
+        self.completed = 0
+        self.by_class = {}  # class name -> [total, completed]
+        self.by_type = {}  # assignment type -> [total, completed]
+        self.by_week = {}  # (ISO year, ISO week) -> [total, completed]
+        for a in assignments:
+            self.add(a)
+
+    def add(self, a):
+        self._count(a, 1)
+
+    def remove(self, a):
+        self._count(a, -1)
+
+    def on_change(self, kind, old, new):
+        # AssignmentIndex listener: an edit takes the old version out and puts the new one in
+        if old is not None:
+            self.remove(old)
+        if new is not None:
+            self.add(new)
+
+    def _count(self, a, step):
+        done = step if a.completed else 0
+        self.total += step
+        self.completed += done
+        for groups, key in ((self.by_class, a.class_name), (self.by_type, a.assignment_type), (self.by_week, week_of(a))):
+            if key is None:
+                continue
+            counts = groups.get(key)
+            if counts is None:
+                counts = groups[key] = [0, 0]
+            counts[0] += step
+            counts[1] += done
+            if counts[0] == 0:
+                del groups[key]
+
+    def percent(self):
+        return percent(self.completed, self.total)
+
+    def breakdown(self, grouping):
+        # [(label, total, completed, percent)] for "class", "type" or "week", sorted by label
+        groups = {"class": self.by_class, "type": self.by_type, "week": self.by_week}[grouping]
+        rows = []
+        for key, (total, completed) in sorted(groups.items()):
+            label = week_label(key) if grouping == "week" else key
+            rows.append((label, total, completed, percent(completed, total)))
+        return rows
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "completed": self.completed,
+            "percent": self.percent(),
+            **{f"by_{grouping}": {label: {"total": total, "completed": completed}
+                                  for label, total, completed, _ in self.breakdown(grouping)}
+               for grouping in GROUPINGS},
+        }
@@ -0,0 +1,85 @@
+# Search over the title, class name and type of a user's assignments.
+#
+# Every word of those fields is lowercased and kept in an inverted index (word -> ids) plus a sorted
+# list of the distinct words, so a search term matches every word it is a prefix of with a bisect
+# instead of a scan. A query matches the assignments that have a match for every one of its terms
+# ("ess eng" finds an essay for English). It is kept up to date from the AssignmentIndex's change
+# events (see AssignmentIndex.search).
+import re
+from bisect import bisect_left, insort
+
+WORD = re.compile(r"\w+")
+
+
+def assignment_words(a):
+    return frozenset(WORD.findall(f"{a.title} {a.class_name} {a.assignment_type}".casefold()))
+
+
+class SearchIndex:
+    def __init__(self, assignments=()):
+        self.postings = {}  # word -> set of assignment ids
+        self.vocabulary = []  # every word in postings, sorted
+        self.words_of = {}  # assignment id -> its words, to undo them when it changes
+        self._last = (None, None)  # (terms, ids) of the previous search, narrowed while typing
+        for a in assignments:
+            found = self.words_of[a.id] = assignment_words(a)
+            for word in found:
+                ids = self.postings.get(word)
+                if ids is None:
+                    ids = self.postings[word] = set()
+                ids.add(a.id)
+        self.vocabulary = sorted(self.postings)
+
+    def add(self, a):
+        found = self.words_of[a.id] = assignment_words(a)
+        for word in found:
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                insort(self.vocabulary, word)
+            ids.add(a.id)
+        self._last = (None, None)
+
+    def remove(self, assignment_id):
+        for word in self.words_of.pop(assignment_id, ()):
+            ids = self.postings[word]
+            ids.discard(assignment_id)
+            if not ids:
+                del self.postings[word]
+                del self.vocabulary[bisect_left(self.vocabulary, word)]
+        self._last = (None, None)
+
+    def on_change(self, kind, old, new):
+        # AssignmentIndex listener
+        if old is not None:
+            self.remove(old.id)
+        if new is not None:
+            self.add(new)
+
+    def prefix_ids(self, term):
+        # ids of the assignments with a word starting with term
+        start = bisect_left(self.vocabulary, term)
+        end = bisect_left(self.vocabulary, term + "\U0010ffff")
+        if end - start == 1:
+            return self.postings[self.vocabulary[start]]
+        return set().union(*[self.postings[word] for word in self.vocabulary[start:end]])
+
+    def search(self, query):
+        # ids of the assignments matching every term of the query (None for an empty query, which matches all)
+        terms = sorted(set(WORD.findall(query.casefold())), key=len, reverse=True)
+        if not terms:
+            return None
+        last_terms, last_ids = self._last
+        if last_terms is not None and len(terms) >= len(last_terms) and \
+                all(any(term.startswith(old) for term in terms) for old in last_terms) and len(last_ids) < 256:
+            # typing more of the same query can only narrow the last result, which is small here
+            ids = {i for i in last_ids if all(any(w.startswith(t) for w in self.words_of[i]) for t in terms)}
+        else:
+            ids = None
+            for term in terms:
+                matches = self.prefix_ids(term)
+                ids = set(matches) if ids is None else ids & matches
+                if not ids:
+                    break
+        self._last = (terms, ids)
+        return ids
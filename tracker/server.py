@@ -0,0 +1,389 @@
+# Local HTTP/JSON API over the tracker data, for other tools on this machine (a browser view,
+# scripts, a status bar widget) that want what the app shows without parsing the data files.
+#
+#   python -m tracker.server --port 8765
+#
+#   POST   /signin                         {"username", "password"} -> the user's role and default view
+#   GET    /users/<user>/assignments       ?class=&type=&completed=true|false&priority=true&from=&to=&q=
+#   POST   /users/<user>/assignments       {"title", "due_date", "class_name", "assignment_type", "completed", "priority"}
+#   PATCH  /users/<user>/assignments/<id>  any of those fields, plus the "version" it was read at to refuse stale edits
+#   DELETE /users/<user>/assignments/<id>
+#   GET    /users/<user>/progress          ?by=class|type|week
+#   GET    /users/<user>/settings
+#   PATCH  /users/<user>/settings          {"default_view", "profile_picture", "first_name", "last_name"}
+#
+# Text fields must be json strings and completed/priority json true/false; anything else is a 400
+# before anything is saved.
+#
+# One process keeps the data warm: the cached backend, and every user's AssignmentIndex (with its
+# progress, search and sort orders), updated by the requests that change it and rebuilt when another
+# program changed the user's data. Saves run on worker threads and are answered once they are on disk;
+# the saves of requests that arrive while one is being written go out together in the next write (see
+# CachedBackend), and a change made from an outdated record is answered with 409.
+# It only listens on 127.0.0.1 and checks passwords only for /signin, like the rest of the local data.
+# Web pages the user opens must not be able to use it: requests must name this server in their Host
+# header (a page on a rebound DNS name sends its own) and can't come from another page's Origin, and
+# writes must be Content-Type: application/json, which a page can't send to another origin without
+# a CORS preflight that this server never allows.
+import argparse
+import asyncio
+import json
+import signal
+import traceback
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from tracker import core, formats, progress, storage
+from tracker.index import AssignmentIndex
+from tracker.models import Assignment
+
+MAX_BODY = 1 << 20
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+WRITE_METHODS = ("POST", "PUT", "PATCH")
+ASSIGNMENT_FIELDS = ("title", "due_date", "class_name", "assignment_type", "completed", "priority")
+ASSIGNMENT_DEFAULTS = {"title": "", "due_date": "", "class_name": "", "assignment_type": "", "completed": False, "priority": False}
+FLAG_FIELDS = ("completed", "priority")
+SETTINGS_FIELDS = ("default_view", "profile_picture", "first_name", "last_name")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def flag(query, name):
+    # a true/false query parameter, or None when it isn't given
+    values = query.get(name)
+    if not values:
+        return None
+    if values[-1].lower() in ("true", "1", "yes"):
+        return True
+    if values[-1].lower() in ("false", "0", "no"):
+        return False
+    raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be true or false")
+
+
+def day(query, name):
+    values = query.get(name)
+    if not values:
+        return None
+    try:
+        return date.fromisoformat(values[-1])
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a date (YYYY-MM-DD)")
+
+
+def check_types(body, names):
+    # json can send any type; the records only hold strings, true/false flags and integer versions
+    for name in names:
+        if name not in body:
+            continue
+        value = body[name]
+        if name in FLAG_FIELDS:
+            if not isinstance(value, bool):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be true or false")
+        elif name == "version":
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "version must be an integer")
+        elif not isinstance(value, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a string")
+
+
+def new_assignment(body, old=None, assignment_id=None):
+    # the Assignment a POST body (or a PATCH body over `old`) describes, checked before it is indexed or saved
+    check_types(body, ASSIGNMENT_FIELDS)
+    fields = {name: body[name] if name in body else getattr(old, name) if old is not None else default
+              for name, default in ASSIGNMENT_DEFAULTS.items()}
+    core.validate_assignment(fields["title"], fields["due_date"])
+    return Assignment(fields["title"], fields["due_date"], fields["class_name"], fields["assignment_type"],
+                      completed=fields["completed"], priority=fields["priority"], assignment_id=assignment_id,
+                      version=old.version if old is not None else 0)
+
+
+def check_headers(method, headers, port):
+    # refuses requests a web page could have made (see the top of this file)
+    allowed = {f"{host}:{port}" for host in LOCAL_HOSTS}
+    if headers.get("host", "").lower() not in allowed:
+        raise HTTPError(HTTPStatus.FORBIDDEN, f"Host must be one of: {', '.join(sorted(allowed))}")
+    origin = headers.get("origin")
+    if origin is not None and origin.lower() not in {f"http://{host}" for host in allowed}:
+        raise HTTPError(HTTPStatus.FORBIDDEN, "Cross-origin requests are not allowed")
+    content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+    if method in WRITE_METHODS and content_type != "application/json":
+        raise HTTPError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "The request body must be sent as Content-Type: application/json")
+
+
+def assignment_json(a):
+    return dict(a.to_dict(), version=a.version)
+
+
+class API:
+    # the request handlers; every method gets the path parameters, the query and the decoded body
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.indexes = {}  # username -> (the cached records it was built from, AssignmentIndex)
+
+    def index(self, username):
+        # the user's warm AssignmentIndex; the cache hands out the same records dictionary for as
+        # long as nobody else changed the user's assignments, so a new one means rebuild
+        if self.tracker.user(username) is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"User '{username}' does not exist.")
+        records = self.tracker.backend.load_user_assignments(username)
+        cached = self.indexes.get(username)
+        if cached is not None and cached[0] is records:
+            return cached[1]
+        index = AssignmentIndex(Assignment.from_dict(a, key) for key, a in records.items())
+        self.indexes[username] = (records, index)
+        return index
+
+    async def save(self, username, function, *args):
+        # runs a save on a worker thread; the index already has the change, so if saving it fails
+        # (a conflict, a disk error) the index is rebuilt from the data
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+        except Exception:
+            self.indexes.pop(username, None)
+            raise
+
+    def route(self, method, path):
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts == ["signin"] and method == "POST":
+            return self.signin, ()
+        if len(parts) >= 3 and parts[0] == "users":
+            username, resource, rest = parts[1], parts[2], parts[3:]
+            handler = {
+                ("assignments", "GET", 0): self.list_assignments,
+                ("assignments", "POST", 0): self.add_assignment,
+                ("assignments", "PATCH", 1): self.edit_assignment,
+                ("assignments", "PUT", 1): self.edit_assignment,
+                ("assignments", "DELETE", 1): self.delete_assignment,
+                ("progress", "GET", 0): self.progress,
+                ("settings", "GET", 0): self.settings,
+                ("settings", "PATCH", 0): self.update_settings,
+            }.get((resource, method, len(rest)))
+            if handler is not None:
+                return handler, (username, *rest)
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No {method} {path}")
+
+    def signin(self, query, body):
+        check_types(body, ("username", "password"))
+        user = self.tracker.authenticate(body.get("username"), body.get("password"))
+        if user is None:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Invalid username or password.")
+        username = user["username"]
+        return {"username": username, "role": user.get("role", ""), "default_view": self.tracker.default_view(username)}
+
+    def list_assignments(self, query, body, username):
+        index = self.index(username)
+        assignments = index.sorting.order("due_date")
+        terms = query.get("q")
+        if terms:
+            ids = index.search.search(terms[-1])
+            if ids is not None:
+                assignments = (a for a in assignments if a.id in ids)
+        assignments = core.filter_assignments(assignments, (query.get("class") or [None])[-1], flag(query, "completed"),
+                                              day(query, "from"), day(query, "to"), (query.get("type") or [None])[-1],
+                                              flag(query, "priority"))
+        return [assignment_json(a) for a in assignments]
+
+    async def add_assignment(self, query, body, username):
+        index = self.index(username)
+        a = new_assignment(body)
+        index.add(a)
+        await self.save(username, self.tracker.save_assignment, username, a)
+        return HTTPStatus.CREATED, assignment_json(a)
+
+    async def edit_assignment(self, query, body, username, assignment_id):
+        index = self.index(username)
+        old = index.get(assignment_id)
+        if old is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No assignment with id '{assignment_id}'.")
+        check_types(body, ("version",))
+        if "version" in body and body["version"] != old.version:
+            raise HTTPError(HTTPStatus.CONFLICT, f"Assignment '{assignment_id}' was changed since version {body['version']}.")
+        a = new_assignment(body, old, assignment_id)
+        index.replace(a)
+        await self.save(username, self.tracker.save_assignment, username, a)
+        return assignment_json(a)
+
+    async def delete_assignment(self, query, body, username, assignment_id):
+        index = self.index(username)
+        if index.remove(assignment_id) is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No assignment with id '{assignment_id}'.")
+        await self.save(username, self.tracker.delete_assignments, username, [assignment_id])
+        return HTTPStatus.NO_CONTENT, None
+
+    def progress(self, query, body, username):
+        counts = self.index(username).progress
+        grouping = (query.get("by") or [None])[-1]
+        if grouping is None:
+            return counts.to_dict()
+        if grouping not in progress.GROUPINGS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"by must be one of: {', '.join(progress.GROUPINGS)}")
+        return [{"label": label, "total": total, "completed": completed, "percent": percent}
+                for label, total, completed, percent in counts.breakdown(grouping)]
+
+    def settings(self, query, body, username):
+        if self.tracker.user(username) is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"User '{username}' does not exist.")
+        return {name: value for name, value in self.tracker.settings(username).items() if name != "password"}
+
+    async def update_settings(self, query, body, username):
+        if self.tracker.user(username) is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"User '{username}' does not exist.")
+        unknown = set(body) - set(SETTINGS_FIELDS)
+        if unknown:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Settings that can't be changed here: {', '.join(sorted(unknown))}")
+        check_types(body, SETTINGS_FIELDS)
+        await asyncio.get_running_loop().run_in_executor(None, lambda: self.tracker.update_settings(username, **body))
+        return self.settings(query, {}, username)
+
+    async def handle(self, method, target, raw_body):
+        # returns (status, json-able body or None) for one request
+        url = urlsplit(target)
+        try:
+            handler, params = self.route(method, url.path)
+            body = {}
+            if raw_body:
+                body = json.loads(raw_body)
+                if not isinstance(body, dict):
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "The request body must be a json object.")
+            result = handler(parse_qs(url.query), body, *params)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except ValueError as e:  # TrackerError, or a body that isn't json
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except storage.ConflictError as e:
+            return HTTPStatus.CONFLICT, {"error": str(e)}
+        except Exception:
+            # a bug or a failed save: log it and still answer, the connection stays usable
+            traceback.print_exc()
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+        if isinstance(result, tuple):
+            return result
+        return HTTPStatus.OK, result
+
+
+async def read_request(reader):
+    # (method, target, headers, keep-alive, body) of the next request on the connection, or None when it closed
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length must be a number")
+    if length < 0:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length must be a number")
+    if length > MAX_BODY:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    keep_alive = headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+    return method, target, headers, keep_alive, body
+
+
+def response(status, payload, keep_alive):
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+class Server:
+    def __init__(self, tracker, host="127.0.0.1", port=8765):
+        self.api = API(tracker)
+        self.tracker = tracker
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.serve_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as e:
+                    writer.write(response(e.status, {"error": str(e)}, False))
+                    break
+                except ValueError:  # a request or header line longer than the stream limit
+                    writer.write(response(HTTPStatus.BAD_REQUEST, {"error": "Malformed request"}, False))
+                    break
+                if request is None:
+                    break
+                method, target, headers, keep_alive, body = request
+                try:
+                    check_headers(method, headers, self.port)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                else:
+                    status, payload = await self.api.handle(method, target, body)
+                writer.write(response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            traceback.print_exc()
+        finally:
+            writer.close()
+
+    async def serve_until_stopped(self):
+        # serves until SIGINT/SIGTERM, so the saves in progress finish before the backend is closed
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C still ends asyncio.run with KeyboardInterrupt
+        async with self.server:
+            await stop.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tracker.server", description="Serve the tracker data as a local json api.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", default=".", help="folder with the data files (default: current folder)")
+    parser.add_argument("--backend", choices=storage.BACKENDS, help="storage backend (default: $TRACKER_BACKEND or json)")
+    parser.add_argument("--format", choices=formats.FORMATS, help="file format written (default: $TRACKER_FORMAT or json)")
+    args = parser.parse_args(argv)
+    tracker = core.Tracker(core.open_backend(args.data_dir, args.backend, args.format))
+
+    async def run():
+        server = await Server(tracker, port=args.port).start()
+        print(f"Serving the tracker data on http://127.0.0.1:{server.port}", flush=True)
+        await server.serve_until_stopped()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
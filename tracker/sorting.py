@@ -0,0 +1,45 @@
+# Sorted orders of a user's assignments by each table column, for click-to-sort in the assignment table.
+#
+# The sort key of every assignment is computed once (parsed due date, casefolded text) and each
+# column's order is built the first time the table is sorted by it. After that the orders are kept
+# up to date from the AssignmentIndex's change events (see AssignmentIndex.sorting), so sorting
+# again, or by another column that was used before, is just walking a list.
+from bisect import bisect_left, insort
+from datetime import date
+
+COLUMNS = ("priority", "title", "due_date", "class_name", "assignment_type", "completed")
+
+
+def sort_key(a, column):
+    # the value an assignment is sorted by in a column; the id makes equal values keep a fixed order
+    if column == "priority":
+        value = 0 if a.priority else 1  # priority assignments first
+    elif column == "due_date":
+        value = a.due or date.max  # assignments without a valid due date last
+    elif column == "completed":
+        value = bool(a.completed)
+    else:
+        value = getattr(a, column).casefold()
+    return (value, a.id)
+
+
+class SortedColumns:
+    def __init__(self, index):
+        self.index = index
+        self.orders = {}  # column -> sorted [(key, id)], for the columns sorted by so far
+
+    def order(self, column, reverse=False):
+        # the assignments sorted by column
+        keys = self.orders.get(column)
+        if keys is None:
+            keys = self.orders[column] = sorted(sort_key(a, column) for a in self.index)
+        get = self.index.by_id.__getitem__
+        return (get(key[1]) for key in (reversed(keys) if reverse else keys))
+
+    def on_change(self, kind, old, new):
+        # AssignmentIndex listener: moves the changed assignment in every order built so far
+        for column, keys in self.orders.items():
+            if old is not None:
+                del keys[bisect_left(keys, sort_key(old, column))]
+            if new is not None:
+                insort(keys, sort_key(new, column))
@@ -0,0 +1,702 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import nullcontext
+
+from tracker import formats, instrument, jsonstream
+from tracker.journal import COMPACT_MIN_BYTES, COMPACT_RATIO, Journal, journal_path
+from tracker.locking import FileLock
+
+
+# A single record level change. collection is "users", "settings" or "assignments",
+# key is the assignment key (None for users/settings, or for "all of this user's assignments")
+# and record is the new value, or None when the record is deleted.
+#
+# Every saved record carries a "version" that goes up by one on each write. A change made from a
+# record that was read earlier can pass that record's version (0 for "must not exist yet"); if the
+# stored record has moved on in the meantime, the change is not applied and apply() raises
+# ConflictError. Changes without a version always win.
+Change = namedtuple("Change", ["collection", "username", "key", "record", "version"], defaults=(None,))
+
+LOCK_FILE = ".tracker.lock"
+
+
+class ConflictError(Exception):
+    # raised by apply() after saving the other changes, for the changes whose record was changed
+    # by someone else since it was read
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        names = ", ".join(f"{c.collection} of {c.username}" if c.key is None else f"assignment {c.key} of {c.username}"
+                          for c in conflicts[:5])
+        more = f" and {len(conflicts) - 5} more" if len(conflicts) > 5 else ""
+        super().__init__(f"Changed by someone else in the meantime, not saved: {names}{more}")
+
+
+def read_data(path):
+    # reads a data file in any of the supported formats, treating a missing or broken
+    # file as empty like the original loaders did
+    with instrument.span(f"read {os.path.basename(path)}") as span:
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            span.bytes_read = len(raw)
+            return formats.loads(raw)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+def write_data(path, data, file_format="json"):
+    # writes a data file in the configured format ("json" is the layout the app has always used)
+    with instrument.span(f"write {os.path.basename(path)}") as span:
+        raw = formats.dumps(data, file_format)
+        span.bytes_written = len(raw)
+        atomic_write(path, raw)
+
+def atomic_write(path, raw):
+    # writes to a temporary file next to path and swaps it in with os.replace, so a crash
+    # halfway through leaves either the old or the new file, never a truncated one
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            old = os.stat(path)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        else:
+            os.chmod(tmp_path, old.st_mode & 0o777)
+            new = os.stat(tmp_path)
+            if new.st_mtime_ns <= old.st_mtime_ns:
+                # file times only move every few milliseconds and inode numbers are reused, so make
+                # sure two writes never leave the same file_signature behind
+                os.utime(tmp_path, ns=(new.st_atime_ns, old.st_mtime_ns + 1))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class StorageBackend:
+    # Base class for every storage engine. The whole-collection load/save functions must be
+    # implemented; the record level helpers fall back to apply(), which by default loads the
+    # touched collections once, applies every change and saves them once.
+    rewrites_whole_file = True
+    journaled = False  # assignment changes are appended instead of saved with the whole collection
+
+    def load_users(self):
+        raise NotImplementedError
+
+    def save_users(self, users):
+        raise NotImplementedError
+
+    def load_settings(self):
+        raise NotImplementedError
+
+    def save_settings(self, settings):
+        raise NotImplementedError
+
+    def load_assignments(self):
+        raise NotImplementedError
+
+    def save_assignments(self, assignments):
+        raise NotImplementedError
+
+    def load_user_assignments(self, username):
+        # returns the {key: record} dictionary of one user's assignments
+        return self.load_assignments().get(username, {}).get("assignments", {})
+
+    def signature(self, collection, username=None):
+        # returns a value that changes whenever the stored collection changes, used by the
+        # cache to decide whether its parsed copy is still current (a new object means "always reload")
+        return object()
+
+    def locked(self):
+        # the lock writers hold across a read-change-write; engines that lock themselves don't need one
+        return nullcontext()
+
+    def apply(self, changes, wait=False):
+        # applies a batch of Change tuples, saving each touched collection once; raises
+        # ConflictError (after saving the rest) for changes made from an outdated record.
+        # The engines always write before returning; wait only matters to a write-behind cache.
+        conflicts = []
+        with self.locked():
+            self._apply_locked(changes, conflicts)
+        if conflicts:
+            raise ConflictError(conflicts)
+
+    def _apply_locked(self, changes, conflicts):
+        loaded = {}
+        for change in changes:
+            if change.collection not in loaded:
+                loaded[change.collection] = self.load_collection(change.collection)
+            apply_change(loaded[change.collection], change, conflicts)
+        for collection, data in loaded.items():
+            self.save_collection(collection, data)
+
+    def load_collection(self, collection):
+        if collection == "users":
+            return self.load_users()
+        if collection == "settings":
+            return self.load_settings()
+        if collection == "assignments":
+            return self.load_assignments()
+        raise ValueError(f"Unknown collection '{collection}'")
+
+    def save_collection(self, collection, data):
+        if collection == "users":
+            self.save_users(data)
+        elif collection == "settings":
+            self.save_settings(data)
+        elif collection == "assignments":
+            self.save_assignments(data)
+        else:
+            raise ValueError(f"Unknown collection '{collection}'")
+
+    def put_user(self, username, record, version=None):
+        self.apply([Change("users", username, None, record, version)])
+
+    def put_settings(self, username, record, version=None):
+        self.apply([Change("settings", username, None, record, version)])
+
+    def put_assignment(self, username, key, record, version=None):
+        self.apply([Change("assignments", username, key, record, version)])
+
+    def delete_assignment(self, username, key):
+        # returns True if the assignment existed before it was deleted
+        existed = key in self.load_user_assignments(username)
+        if existed:
+            self.apply([Change("assignments", username, key, None)])
+        return existed
+
+    def delete_user(self, username):
+        # removes the user together with their settings and assignments
+        self.apply([
+            Change("users", username, None, None),
+            Change("assignments", username, None, None),
+            Change("settings", username, None, None),
+        ])
+
+    def close(self):
+        pass
+
+
+def apply_change(data, change, conflicts=None):
+    # applies one Change to a loaded collection (users, settings or the full assignments dictionary);
+    # with a conflicts list, a change made from an outdated record is added to it instead
+    if change.collection != "assignments":
+        if conflicts is not None and not version_matches(data.get(change.username), change):
+            conflicts.append(change)
+        elif change.record is None:
+            data.pop(change.username, None)
+        else:
+            data[change.username] = stamped(data.get(change.username), change)
+    elif change.key is None and change.record is None:
+        data.pop(change.username, None)
+    else:
+        user_data = data.setdefault(change.username, {"assignments": {}})
+        apply_user_assignment_change(user_data.setdefault("assignments", {}), change, conflicts)
+
+def apply_user_assignment_change(user_assignments, change, conflicts=None):
+    # applies one assignment Change to a single user's {key: record} dictionary
+    if change.key is None:
+        user_assignments.clear()
+        user_assignments.update(change.record or {})
+    elif conflicts is not None and not version_matches(user_assignments.get(change.key), change):
+        conflicts.append(change)
+    elif change.record is None:
+        user_assignments.pop(change.key, None)
+    else:
+        user_assignments[change.key] = stamped(user_assignments.get(change.key), change)
+
+def record_version(record):
+    # the version of a stored record: 0 when it doesn't exist, so a change with version 0 only
+    # creates; records saved before there were versions count as version 1
+    return record.get("version", 1) if record is not None else 0
+
+def version_matches(current, change):
+    return change.version is None or record_version(current) == change.version
+
+def stamped(current, change):
+    # the record to store for a change, with its version moved one past the one it was made from
+    base = change.version if change.version is not None else record_version(current)
+    return dict(change.record, version=base + 1)
+
+def file_signature(path):
+    # (inode, modification time, size) of a file, or None when it does not exist; every atomic
+    # write makes a new inode, so even two same-sized writes within one clock tick are told apart
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class JsonBackend(StorageBackend):
+    # The original storage: three json files. Users and settings are read and rewritten as a
+    # whole; assignments.json is a snapshot that assignment changes are appended to in
+    # assignments.journal, folded back in by compact() once the journal gets big (see tracker.journal).
+    rewrites_whole_file = True
+    journaled = True
+
+    def __init__(self, user_file, settings_file, assignments_file, file_format="json"):
+        self.user_file = user_file
+        self.settings_file = settings_file
+        self.assignments_file = assignments_file
+        self.file_format = file_format
+        self.file_lock = FileLock(os.path.join(os.path.dirname(os.path.abspath(user_file)), LOCK_FILE))
+        self.journal = Journal(journal_path(assignments_file))
+        self._known = {}  # username -> {key: record} of the users this backend wrote, to check versions
+        self._known_signature = None  # the assignments signature after this backend's last write
+
+    def locked(self):
+        return self.file_lock
+
+    def signature(self, collection, username=None):
+        if collection == "assignments":
+            return (file_signature(self.assignments_file), file_signature(self.journal.path))
+        paths = {"users": self.user_file, "settings": self.settings_file}
+        return file_signature(paths[collection])
+
+    def _read_assignments(self, read):
+        # runs read() without the lock, again if a writer changed the snapshot or journal meanwhile
+        while True:
+            before = self.signature("assignments")
+            data = read()
+            if self.signature("assignments") == before:
+                return data
+
+    @instrument.timed()
+    def load_users(self):
+        return read_data(self.user_file)
+
+    @instrument.timed()
+    def save_users(self, users):
+        write_data(self.user_file, users, self.file_format)
+
+    @instrument.timed()
+    def load_settings(self):
+        return read_data(self.settings_file)
+
+    @instrument.timed()
+    def save_settings(self, settings):
+        write_data(self.settings_file, settings, self.file_format)
+
+    @instrument.timed()
+    def load_assignments(self):
+        return self._read_assignments(self._load_assignments)
+
+    def _load_assignments(self):
+        assignments = read_data(self.assignments_file)
+        for username, key, record in self.journal.entries():
+            apply_change(assignments, Change("assignments", username, key, record))
+        return assignments
+
+    @instrument.timed()
+    def save_assignments(self, assignments):
+        # a new snapshot with an empty journal
+        with self.file_lock:
+            write_data(self.assignments_file, assignments, self.file_format)
+            atomic_write(self.journal.path, b"")
+            self._known.clear()
+            self._known_signature = None
+
+    @instrument.timed()
+    def load_user_assignments(self, username):
+        # streams assignments.json and only decodes this user's section, then replays their journal lines
+        return self._read_assignments(lambda: self._load_user_assignments(username))
+
+    def _load_user_assignments(self, username):
+        try:
+            if formats.file_format(self.assignments_file) != "json":
+                user_data = read_data(self.assignments_file).get(username, {})
+            else:
+                user_data = jsonstream.load_section(self.assignments_file, username, {})
+        except (FileNotFoundError, ValueError):
+            user_data = {}
+        user_assignments = user_data.get("assignments", {})
+        for _, key, record in self.journal.entries(username):
+            if key is None:
+                user_assignments = dict(record or {})
+            else:
+                apply_user_assignment_change(user_assignments, Change("assignments", username, key, record))
+        return user_assignments
+
+    def _apply_locked(self, changes, conflicts):
+        # users and settings are rewritten once per batch; assignment changes are checked against
+        # the current records and appended to the journal
+        super()._apply_locked([c for c in changes if c.collection != "assignments"], conflicts)
+        changes = [c for c in changes if c.collection == "assignments"]
+        if not changes:
+            return
+
+        if self.signature("assignments") != self._known_signature:
+            self._known = {}  # someone else wrote since our last write
+        current = {}
+        for username in {change.username for change in changes}:
+            known = self._known.get(username)
+            current[username] = known if known is not None else dict(self._load_user_assignments(username))
+        written = []
+        for change in changes:
+            if change.key is None:
+                current[change.username] = dict(change.record or {})
+                written.append(change)
+                continue
+            before = len(conflicts)
+            apply_user_assignment_change(current[change.username], change, conflicts)
+            if len(conflicts) == before:
+                record = current[change.username].get(change.key)
+                written.append(change._replace(record=record))  # with its new version
+        if written:
+            with instrument.span(f"append {os.path.basename(self.journal.path)}") as span:
+                span.bytes_written = self.journal.append(written)
+
+        signature = self.signature("assignments")
+        self._known.update(current)
+        self._known_signature = signature
+        if self.journal.size() > max(COMPACT_MIN_BYTES, COMPACT_RATIO * (signature[0] or (0, 0, 0))[2]):
+            self.compact()
+
+    @instrument.timed()
+    def compact(self):
+        # folds the journal into a new assignments.json snapshot
+        with self.file_lock:
+            assignments = self._load_assignments()
+            write_data(self.assignments_file, assignments, self.file_format)
+            atomic_write(self.journal.path, b"")
+            self._known.clear()
+            self._known_signature = None
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    role TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    username TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assignments (
+    username TEXT NOT NULL,
+    key TEXT NOT NULL,
+    due_date TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (username, key)
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_due_date ON assignments (username, due_date);
+"""
+
+class SqliteBackend(StorageBackend):
+    # Stores every user, settings entry and assignment as its own row so that single record
+    # changes are indexed inserts/updates/deletes instead of whole file rewrites
+    rewrites_whole_file = False
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def _rows(self, query, params=()):
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def signature(self, collection, username=None):
+        # data_version only changes when another connection (another app instance) commits
+        return self._rows("PRAGMA data_version")[0][0]
+
+    @instrument.timed()
+    def load_users(self):
+        return {username: json.loads(data) for username, data in self._rows("SELECT username, data FROM users")}
+
+    @instrument.timed()
+    def save_users(self, users):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM users")
+            self.conn.executemany(
+                "INSERT INTO users (username, role, data) VALUES (?, ?, ?)",
+                [(username, record.get("role"), json.dumps(record)) for username, record in users.items()],
+            )
+
+    @instrument.timed()
+    def load_settings(self):
+        return {username: json.loads(data) for username, data in self._rows("SELECT username, data FROM settings")}
+
+    @instrument.timed()
+    def save_settings(self, settings):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM settings")
+            self.conn.executemany(
+                "INSERT INTO settings (username, data) VALUES (?, ?)",
+                [(username, json.dumps(record)) for username, record in settings.items()],
+            )
+
+    @instrument.timed()
+    def load_assignments(self):
+        assignments = {}
+        for username, key, data in self._rows("SELECT username, key, data FROM assignments"):
+            assignments.setdefault(username, {"assignments": {}})["assignments"][key] = json.loads(data)
+        return assignments
+
+    @instrument.timed()
+    def save_assignments(self, assignments):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM assignments")
+            self.conn.executemany(
+                "INSERT INTO assignments (username, key, due_date, data) VALUES (?, ?, ?, ?)",
+                [
+                    (username, key, record.get("due_date"), json.dumps(record))
+                    for username, user_data in assignments.items()
+                    for key, record in user_data.get("assignments", {}).items()
+                ],
+            )
+
+    @instrument.timed()
+    def load_user_assignments(self, username):
+        rows = self._rows("SELECT key, data FROM assignments WHERE username = ?", (username,))
+        return {key: json.loads(data) for key, data in rows}
+
+    @instrument.timed()
+    def apply(self, changes, wait=False):
+        # every change becomes a single indexed statement, all inside one transaction that takes
+        # the write lock up front, so the version checks and the writes can't interleave with
+        # another process (readers are not blocked in WAL mode)
+        conflicts = []
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for change in changes:
+                    self._apply_one(change, conflicts)
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+        if conflicts:
+            raise ConflictError(conflicts)
+
+    def _current(self, change):
+        # the stored record a change replaces, or None
+        if change.collection == "assignments":
+            row = self.conn.execute("SELECT data FROM assignments WHERE username = ? AND key = ?",
+                                    (change.username, change.key)).fetchone()
+        elif change.collection in ("users", "settings"):
+            row = self.conn.execute(f"SELECT data FROM {change.collection} WHERE username = ?",
+                                    (change.username,)).fetchone()
+        else:
+            raise ValueError(f"Unknown collection '{change.collection}'")
+        return json.loads(row[0]) if row is not None else None
+
+    def _apply_one(self, change, conflicts):
+        if change.collection == "assignments" and change.key is None:
+            self.conn.execute("DELETE FROM assignments WHERE username = ?", (change.username,))
+            for key, record in (change.record or {}).items():
+                self._put_assignment_row(change.username, key, record)
+            return
+
+        record = change.record
+        if change.version is not None or record is not None:
+            current = self._current(change)
+            if not version_matches(current, change):
+                conflicts.append(change)
+                return
+            if record is not None:
+                record = stamped(current, change)
+
+        if change.collection == "users":
+            if record is None:
+                self.conn.execute("DELETE FROM users WHERE username = ?", (change.username,))
+            else:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO users (username, role, data) VALUES (?, ?, ?)",
+                    (change.username, record.get("role"), json.dumps(record)),
+                )
+        elif change.collection == "settings":
+            if record is None:
+                self.conn.execute("DELETE FROM settings WHERE username = ?", (change.username,))
+            else:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO settings (username, data) VALUES (?, ?)",
+                    (change.username, json.dumps(record)),
+                )
+        elif record is None:
+            self.conn.execute(
+                "DELETE FROM assignments WHERE username = ? AND key = ?", (change.username, change.key)
+            )
+        else:
+            self._put_assignment_row(change.username, change.key, record)
+
+    def _put_assignment_row(self, username, key, record):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO assignments (username, key, due_date, data) VALUES (?, ?, ?, ?)",
+            (username, key, record.get("due_date"), json.dumps(record)),
+        )
+
+    def delete_assignment(self, username, key):
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM assignments WHERE username = ? AND key = ?", (username, key)
+            )
+            return cursor.rowcount > 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class ShardedJsonBackend(StorageBackend):
+    # Keeps users.json and users_settings.json as they are, but gives every user their own
+    # assignments file inside shard_dir. A small manifest lists which users have a shard, so
+    # logging in, adding and deleting only ever read and write the current user's file.
+    rewrites_whole_file = False
+    MANIFEST = "manifest.json"
+
+    def __init__(self, user_file, settings_file, shard_dir, file_format="json"):
+        self.file_format = file_format
+        self.user_file = user_file
+        self.settings_file = settings_file
+        self.shard_dir = shard_dir
+        self.manifest_file = os.path.join(shard_dir, self.MANIFEST)
+        self.file_lock = FileLock(os.path.join(os.path.dirname(os.path.abspath(user_file)), LOCK_FILE))
+        os.makedirs(shard_dir, exist_ok=True)
+
+    def locked(self):
+        return self.file_lock
+
+    def shard_path(self, username):
+        # the shard name only depends on the username, so finding it never needs the manifest;
+        # the hash keeps usernames that clean up to the same text apart
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", username)[:40]
+        digest = hashlib.sha1(username.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.shard_dir, f"{safe}-{digest}.json")
+
+    def signature(self, collection, username=None):
+        if collection == "users":
+            return file_signature(self.user_file)
+        if collection == "settings":
+            return file_signature(self.settings_file)
+        if username is not None:
+            return file_signature(self.shard_path(username))
+        return (file_signature(self.manifest_file),
+                tuple(file_signature(self.shard_path(u)) for u in self.load_manifest()))
+
+    def load_manifest(self):
+        # returns the usernames that have a shard
+        return read_data(self.manifest_file).get("users", [])
+
+    def save_manifest(self, usernames):
+        write_data(self.manifest_file, {"format": 1, "users": sorted(usernames)}, self.file_format)
+
+    @instrument.timed()
+    def load_users(self):
+        return read_data(self.user_file)
+
+    @instrument.timed()
+    def save_users(self, users):
+        write_data(self.user_file, users, self.file_format)
+
+    @instrument.timed()
+    def load_settings(self):
+        return read_data(self.settings_file)
+
+    @instrument.timed()
+    def save_settings(self, settings):
+        write_data(self.settings_file, settings, self.file_format)
+
+    @instrument.timed()
+    def load_user_assignments(self, username):
+        return read_data(self.shard_path(username)).get("assignments", {})
+
+    @instrument.timed()
+    def save_user_assignments(self, username, user_assignments):
+        write_data(self.shard_path(username), {"assignments": user_assignments}, self.file_format)
+
+    @instrument.timed()
+    def load_assignments(self):
+        return {username: {"assignments": self.load_user_assignments(username)} for username in self.load_manifest()}
+
+    @instrument.timed()
+    def save_assignments(self, assignments):
+        with self.file_lock:
+            old_users = set(self.load_manifest())
+            for username, user_data in assignments.items():
+                self.save_user_assignments(username, user_data.get("assignments", {}))
+            for username in old_users - set(assignments):
+                self._remove_shard(username)
+            self.save_manifest(assignments)
+
+    def _remove_shard(self, username):
+        try:
+            os.remove(self.shard_path(username))
+        except FileNotFoundError:
+            pass
+
+    @instrument.timed()
+    def apply(self, changes, wait=False):
+        return super().apply(changes)
+
+    def _apply_locked(self, changes, conflicts):
+        # users and settings are saved once per batch, assignments once per touched shard
+        super()._apply_locked([c for c in changes if c.collection != "assignments"], conflicts)
+
+        shards = {}
+        for change in changes:
+            if change.collection != "assignments":
+                continue
+            if change.username not in shards:
+                shards[change.username] = dict(self.load_user_assignments(change.username))
+            if change.key is None and change.record is None:
+                shards[change.username] = None
+            else:
+                if shards[change.username] is None:
+                    shards[change.username] = {}
+                apply_user_assignment_change(shards[change.username], change, conflicts)
+        if not shards:
+            return
+
+        old_manifest = set(self.load_manifest())
+        manifest = set(old_manifest)
+        for username, user_assignments in shards.items():
+            if user_assignments is None:
+                self._remove_shard(username)
+                manifest.discard(username)
+            else:
+                self.save_user_assignments(username, user_assignments)
+                manifest.add(username)
+        if manifest != old_manifest:
+            self.save_manifest(manifest)
+
+
+BACKENDS = ("json", "sqlite", "sharded")
+
+def open_backend(name, user_file, settings_file, assignments_file, database_file, shard_dir="assignments",
+                 file_format="json"):
+    # creates the storage engine selected in main.py (or through the TRACKER_BACKEND variable);
+    # file_format is the format the file based engines write, see tracker.formats
+    if name == "json":
+        return JsonBackend(user_file, settings_file, assignments_file, file_format)
+    if name == "sqlite":
+        return SqliteBackend(database_file)
+    if name == "sharded":
+        return ShardedJsonBackend(user_file, settings_file, shard_dir, file_format)
+    raise ValueError(f"Unknown storage backend '{name}', expected one of {', '.join(BACKENDS)}")
+
+
+def migrate(source, target):
+    # copies every user, settings entry and assignment from one backend into another
+    target.save_users(source.load_users())
+    target.save_settings(source.load_settings())
+    target.save_assignments(source.load_assignments())
@@ -0,0 +1,54 @@
+# Profile picture thumbnails, cached by the content of the original image.
+#
+# The chosen image is hashed and shrunk once into thumbnails/<hash>-100x100.png; the settings then
+# point at that file, which Tk can show directly (no Pillow needed) every time the Settings page is
+# opened. Picking the same picture again, even from another folder, reuses the cached thumbnail.
+# Pillow is only imported here, when a thumbnail actually has to be made.
+import hashlib
+import io
+import os
+
+from tracker.storage import atomic_write
+
+THUMBNAIL_DIR = "thumbnails"
+SIZE = (100, 100)
+CHUNK_SIZE = 1 << 20
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def thumbnail_path(digest, size=SIZE, directory=THUMBNAIL_DIR):
+    return os.path.join(directory, f"{digest[:32]}-{size[0]}x{size[1]}.png")
+
+
+def is_thumbnail(path, directory=THUMBNAIL_DIR):
+    return os.path.dirname(os.path.normpath(path)) == os.path.normpath(directory) and path.endswith(".png")
+
+
+def make_thumbnail(source, size=SIZE, directory=THUMBNAIL_DIR):
+    # returns the path of the source image's thumbnail, making it first if it isn't cached yet;
+    # slow for big photos, so the app calls it on a loader thread
+    target = thumbnail_path(content_hash(source), size, directory)
+    if os.path.exists(target):
+        return target
+
+    from PIL import Image
+
+    with Image.open(source) as img:
+        # JPEGs are decoded at a reduced scale straight away instead of at full size
+        img.draft("RGB", size)
+        img.thumbnail(size)
+        if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA")
+        data = io.BytesIO()
+        img.save(data, format="PNG")
+
+    os.makedirs(directory, exist_ok=True)
+    atomic_write(target, data.getvalue())
+    return target
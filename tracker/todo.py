@@ -0,0 +1,71 @@
+# The to-do list: the assignments that aren't completed, priority ones first and then by due date.
+#
+# The open assignments are kept in a heap, and only the part of the list that has been looked at is
+# taken out of it and kept sorted. Showing the first 100 of 10,000 open assignments therefore costs
+# a heapify and 100 pops instead of a full sort, and adding, completing or deleting one assignment
+# is a heap push or a small insert into the sorted part.
+import heapq
+from bisect import bisect_left, insort
+from datetime import date
+
+
+def sort_key(a):
+    # priority first, then the earliest due date (no valid date last), then the title; the id at
+    # the end makes every key unique
+    return (0 if a.priority else 1, a.due or date.max, a.title, a.id)
+
+
+class TodoQueue:
+    def __init__(self, assignments=()):
+        self.keys = {}  # id -> sort key of every open assignment
+        self.assignments = {}  # id -> assignment, for every open assignment
+        self.sorted = []  # keys of the first len(sorted) open assignments, in order
+        self.heap = []  # keys of the other open assignments, plus stale keys of removed ones
+        for a in assignments:
+            if not a.completed:
+                key = sort_key(a)
+                self.keys[a.id] = key
+                self.assignments[a.id] = a
+                self.heap.append(key)
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, assignment_id):
+        return assignment_id in self.keys
+
+    def update(self, a):
+        # adds, moves or (once it is completed) removes an assignment
+        self.discard(a.id)
+        if a.completed:
+            return
+        key = sort_key(a)
+        self.keys[a.id] = key
+        self.assignments[a.id] = a
+        if self.sorted and key < self.sorted[-1]:
+            insort(self.sorted, key)
+        else:
+            heapq.heappush(self.heap, key)
+
+    def discard(self, assignment_id):
+        # removes an assignment if it is in the list; keys left in the heap are skipped when popped
+        key = self.keys.pop(assignment_id, None)
+        if key is None:
+            return
+        del self.assignments[assignment_id]
+        if self.sorted and key <= self.sorted[-1]:
+            del self.sorted[bisect_left(self.sorted, key)]
+        elif len(self.heap) > 2 * len(self.keys) + 64:
+            # mostly stale keys: rebuild the heap from the live ones
+            self.heap = [k for k in self.heap if self.keys.get(k[-1]) == k]
+            heapq.heapify(self.heap)
+
+    def top(self, n):
+        # the first n assignments of the list
+        while len(self.sorted) < n and self.heap:
+            key = heapq.heappop(self.heap)
+            if self.keys.get(key[-1]) != key or (self.sorted and self.sorted[-1] == key):
+                continue  # removed since it was pushed, or a second copy of the same key
+            self.sorted.append(key)
+        return [self.assignments[key[-1]] for key in self.sorted[:n]]
@@ -0,0 +1,81 @@
+import queue
+import threading
+
+
+class SaveQueue:
+    # Runs a flush function on a background thread so that the Tk event loop never waits on the
+    # disk. Callers only say that something is dirty with request(); every request that arrives
+    # before the writer wakes up is coalesced into the same flush. A flush that fails is tried again
+    # after retry_delay (or straight away by flush()), since the function keeps what it couldn't write.
+    def __init__(self, flush, delay=0.2, retry_delay=5.0):
+        self._flush = flush
+        self.delay = delay
+        self.retry_delay = retry_delay
+        self.errors = queue.Queue()  # exceptions raised by flushes, for the UI to report
+        self._cond = threading.Condition()
+        self._requested = False
+        self._urgent = False
+        self._busy = False
+        self._failed = False  # the last flush raised, so the next one waits retry_delay
+        self._started = 0  # flushes started so far
+        self._finished = 0  # flushes finished so far
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="tracker-writer", daemon=True)
+        self._thread.start()
+
+    def request(self):
+        # marks the state dirty; the writer flushes it after a short delay
+        with self._cond:
+            self._requested = True
+            self._cond.notify_all()
+
+    def flush(self, wait=True):
+        # asks the writer to flush straight away, optionally blocking until it is done or one
+        # more attempt has failed (the error is in `errors`)
+        with self._cond:
+            if self._requested:
+                self._urgent = True
+                self._cond.notify_all()
+            if wait:
+                # the next flush when something is waiting for one, else the one running now
+                attempt = self._started + 1 if self._requested else self._started
+                self._cond.wait_for(lambda: (not self._requested and not self._busy) or self._finished >= attempt)
+
+    def close(self):
+        # makes a last attempt to flush whatever is left and stops the writer thread; the caller
+        # deals with anything that still couldn't be written
+        self.flush(wait=True)
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._requested or self._closing)
+                if self._closing or not self._requested:
+                    return
+                # give the caller a moment to make more changes that can share this flush
+                self._cond.wait_for(lambda: self._urgent or self._closing,
+                                    timeout=self.retry_delay if self._failed else self.delay)
+                if self._closing:
+                    return
+                self._requested = False
+                self._urgent = False
+                self._busy = True
+                self._started += 1
+            failed = False
+            try:
+                self._flush()
+            except Exception as e:
+                failed = True
+                self.errors.put(e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._failed = failed
+                    if failed:
+                        self._requested = True  # the changes are still queued: try again
+                    self._finished += 1
+                    self._cond.notify_all()